@@ -46,6 +46,21 @@ cp src/flash.py "$INSTALL_DIR/src/"
 cp src/overlay.py "$INSTALL_DIR/src/"
 cp src/tray_manager.py "$INSTALL_DIR/src/"
 cp src/main.py "$INSTALL_DIR/src/"
+cp src/app.py "$INSTALL_DIR/src/"
+cp src/daemon.py "$INSTALL_DIR/src/"
+cp src/metrics.py "$INSTALL_DIR/src/"
+cp src/cli.py "$INSTALL_DIR/src/"
+cp src/waybar.py "$INSTALL_DIR/src/"
+cp src/alerts.py "$INSTALL_DIR/src/"
+cp src/canvas.py "$INSTALL_DIR/src/"
+cp src/render_bench.py "$INSTALL_DIR/src/"
+cp src/perf.py "$INSTALL_DIR/src/"
+cp src/replay.py "$INSTALL_DIR/src/"
+cp src/memory.py "$INSTALL_DIR/src/"
+cp src/dumps.py "$INSTALL_DIR/src/"
+cp src/soak.py "$INSTALL_DIR/src/"
+cp src/layout.py "$INSTALL_DIR/src/"
+cp src/severity.py "$INSTALL_DIR/src/"
 cp src/tray.py "$INSTALL_DIR/src/"
 
 if [ ! -f "$CONFIG_DIR/config.toml" ]; then
@@ -64,10 +79,26 @@ exec $PYTHON_CMD -m src.main "\$@"
 LAUNCHER
 chmod +x "$BIN_DIR/quota-monitor"
 
+# Terminal client: no layer-shell preload, so GTK is never loaded.
+# Defaults to a one-shot table unless another terminal mode is given.
+cat > "$BIN_DIR/quota-monitor-cli" << LAUNCHER
+#!/bin/bash
+cd "${INSTALL_DIR}"
+for ARG in "\$@"; do
+    case "\$ARG" in
+        --once|--json|--watch|--waybar) exec $PYTHON_CMD -m src.main "\$@" ;;
+    esac
+done
+exec $PYTHON_CMD -m src.main --once "\$@"
+LAUNCHER
+chmod +x "$BIN_DIR/quota-monitor-cli"
+
 cat > "$BIN_DIR/quota-monitor-toggle" << 'TOGGLE'
 #!/bin/bash
-PID=$(pgrep -f "src.main" | head -1)
-if [ -n "$PID" ]; then
+# The overlay writes this pidfile; headless modes (--daemon, --waybar, ...)
+# share its command line, so pgrep cannot tell them apart.
+PID=$(cat "${XDG_RUNTIME_DIR:-/tmp}/quota-monitor.pid" 2>/dev/null)
+if [ -n "$PID" ] && grep -qa "src.main" "/proc/$PID/cmdline" 2>/dev/null; then
     kill -USR1 "$PID"
     echo "Toggled click-through mode"
 else
@@ -78,8 +109,10 @@ chmod +x "$BIN_DIR/quota-monitor-toggle"
 
 cat > "$BIN_DIR/quota-monitor-visibility" << 'VIS'
 #!/bin/bash
-PID=$(pgrep -f "src.main" | head -1)
-if [ -n "$PID" ]; then
+# The overlay writes this pidfile; headless modes (--daemon, --waybar, ...)
+# share its command line, so pgrep cannot tell them apart.
+PID=$(cat "${XDG_RUNTIME_DIR:-/tmp}/quota-monitor.pid" 2>/dev/null)
+if [ -n "$PID" ] && grep -qa "src.main" "/proc/$PID/cmdline" 2>/dev/null; then
     kill -USR2 "$PID"
     echo "Toggled visibility"
 else
@@ -88,6 +121,38 @@ fi
 VIS
 chmod +x "$BIN_DIR/quota-monitor-visibility"
 
+# Diagnostic dumps: signal every instance, then print the JSON each one wrote
+# to $XDG_RUNTIME_DIR/quota-monitor-<kind>-<pid>.json (see src/dumps.py).
+write_dump_script() {
+    local name="$1" sig="$2" kind="$3" comment="$4"
+    cat > "$BIN_DIR/$name" << DUMP
+#!/bin/bash
+# $comment
+RUNTIME_DIR="\${XDG_RUNTIME_DIR:-/tmp}"
+PIDS=\$(pgrep -f "src.main")
+if [ -z "\$PIDS" ]; then
+    echo "quota-monitor not running"
+    exit 1
+fi
+for PID in \$PIDS; do
+    kill -$sig "\$PID"
+done
+sleep 0.5
+for PID in \$PIDS; do
+    if [ -f "\$RUNTIME_DIR/quota-monitor-$kind-\$PID.json" ]; then
+        echo "# pid \$PID"
+        cat "\$RUNTIME_DIR/quota-monitor-$kind-\$PID.json"
+    fi
+done
+DUMP
+    chmod +x "$BIN_DIR/$name"
+}
+
+write_dump_script quota-monitor-perf RTMIN+1 perf \
+    "Dump timing histograms of every running instance started with perf enabled"
+write_dump_script quota-monitor-memory RTMIN+2 memory \
+    "Dump RSS, GC and (with debug.tracemalloc_frames) top allocators of every instance"
+
 cat > "$DESKTOP_DIR/quota-monitor.desktop" << 'DESKTOP'
 [Desktop Entry]
 Version=1.0
@@ -112,6 +177,7 @@ echo ""
 echo "Commands:"
 echo "  quota-monitor        - Start the overlay"
 echo "  quota-monitor-toggle - Toggle click-through mode"
+echo "  quota-monitor-cli    - Print quotas in the terminal (--json, --watch, --waybar)"
 echo "  systemctl --user enable --now quota-monitor.service - Run as systemd service"
 echo ""
 echo "Config file:"
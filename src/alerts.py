@@ -0,0 +1,245 @@
+"""Threshold alerting with hysteresis and desktop/webhook delivery.
+
+Rules are matched once per (provider, credential key, group) key and
+re-evaluated only for keys whose remaining percentage changed since the
+previous poll.
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import threading
+import urllib.request
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Iterator, Optional
+
+from .config import CONFIG
+from . import data
+
+
+SEVERITY_URGENCY = {"ok": 0, "warn": 1, "critical": 2}
+
+# Above this many alerts in one poll, send a single summary notification.
+MAX_NOTIFICATIONS_PER_POLL = 3
+
+GroupKey = tuple[str, str, str]
+
+
+@dataclass
+class AlertRule:
+    threshold: float
+    severity: str = "warn"
+    provider: str = "*"
+    credential: str = "*"
+    group: str = "*"
+
+    def matches(self, key: GroupKey, credential_name: str) -> bool:
+        """Credential globs match the credential key or its identifier."""
+        provider, credential, group = key
+        return (
+            fnmatchcase(provider.lower(), self.provider.lower())
+            and (
+                fnmatchcase(credential, self.credential)
+                or fnmatchcase(credential_name, self.credential)
+            )
+            and fnmatchcase(group, self.group)
+        )
+
+
+@dataclass
+class Alert:
+    provider: str
+    credential: str
+    group: str
+    remaining_pct: float
+    rule: AlertRule
+
+
+def iter_groups(
+    quota_data: data.QuotaData,
+) -> Iterator[tuple[GroupKey, str, data.QuotaGroup]]:
+    """(key, credential name, group) for per-credential groups, or provider-wide
+    groups for providers without credentials."""
+    for provider in quota_data.providers:
+        if provider.credentials:
+            for cred in provider.credentials:
+                for group in cred.quota_groups:
+                    yield (provider.name, cred.key, group.name), cred.name, group
+        else:
+            for group in provider.quota_groups:
+                yield (provider.name, "all", group.name), "all", group
+
+
+class AlertEngine:
+    """Incremental rule evaluation with per-rule hysteresis."""
+
+    def __init__(self, rules: list[AlertRule], hysteresis: float = 5.0):
+        self.rules = rules
+        self.hysteresis = hysteresis
+        self._last_pct: dict[GroupKey, float] = {}
+        self._rules_for: dict[GroupKey, list[int]] = {}
+        self._firing: set[tuple[GroupKey, int]] = set()
+
+    def _matching_rules(self, key: GroupKey, credential_name: str) -> list[int]:
+        rule_ids = self._rules_for.get(key)
+        if rule_ids is None:
+            rule_ids = [
+                i
+                for i, rule in enumerate(self.rules)
+                if rule.matches(key, credential_name)
+            ]
+            self._rules_for[key] = rule_ids
+        return rule_ids
+
+    def evaluate(self, quota_data: Optional[data.QuotaData]) -> list[Alert]:
+        """Return alerts for rules that started firing in this snapshot."""
+        if quota_data is None:
+            return []
+
+        alerts = []
+        seen: set[GroupKey] = set()
+
+        for key, credential_name, group in iter_groups(quota_data):
+            seen.add(key)
+            pct = float(group.remaining_pct or 0)
+            if self._last_pct.get(key) == pct:
+                continue
+            self._last_pct[key] = pct
+
+            fired: Optional[AlertRule] = None
+            for idx in self._matching_rules(key, credential_name):
+                rule = self.rules[idx]
+                state_key = (key, idx)
+                if state_key not in self._firing:
+                    if pct <= rule.threshold:
+                        self._firing.add(state_key)
+                        if fired is None or rule.threshold < fired.threshold:
+                            fired = rule
+                elif pct > rule.threshold + self.hysteresis:
+                    self._firing.discard(state_key)
+
+            if fired is not None:
+                provider, _, group_name = key
+                alerts.append(
+                    Alert(provider, credential_name, group_name, pct, fired)
+                )
+
+        if len(seen) != len(self._last_pct):
+            self._evict(seen)
+
+        return alerts
+
+    def _evict(self, seen: set[GroupKey]):
+        for key in [k for k in self._last_pct if k not in seen]:
+            del self._last_pct[key]
+            self._rules_for.pop(key, None)
+        self._firing = {s for s in self._firing if s[0] in seen}
+
+
+def _gvariant_str(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
+    return f"'{escaped}'"
+
+
+def notify_dbus(summary: str, body: str, severity: str) -> None:
+    """Send a notification through org.freedesktop.Notifications via gdbus."""
+    urgency = SEVERITY_URGENCY.get(severity, 1)
+    subprocess.run(
+        [
+            "gdbus", "call", "--session",
+            "--dest", "org.freedesktop.Notifications",
+            "--object-path", "/org/freedesktop/Notifications",
+            "--method", "org.freedesktop.Notifications.Notify",
+            _gvariant_str("Quota Monitor"),
+            "0",
+            _gvariant_str("utilities-system-monitor"),
+            _gvariant_str(summary),
+            _gvariant_str(body),
+            "[]",
+            f"{{'urgency': <byte {urgency}>}}",
+            "10000",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        timeout=5,
+        check=True,
+    )
+
+
+def post_webhook(url: str, alerts: list[Alert]) -> None:
+    payload = {
+        "alerts": [
+            {
+                "provider": a.provider,
+                "credential": a.credential,
+                "group": a.group,
+                "remaining_pct": a.remaining_pct,
+                "threshold": a.rule.threshold,
+                "severity": a.rule.severity,
+            }
+            for a in alerts
+        ]
+    }
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=5):
+        pass
+
+
+def _describe(alert: Alert) -> tuple[str, str]:
+    summary = f"{alert.provider.upper()} {alert.group}: {int(alert.remaining_pct)}% left"
+    body = f"{alert.credential} is at or below {alert.rule.threshold:g}% ({alert.rule.severity})"
+    return summary, body
+
+
+class AlertNotifier:
+    """Evaluates snapshots and delivers alerts off the polling thread."""
+
+    def __init__(self, engine: AlertEngine, methods: list[str], webhook_url: str = ""):
+        self.engine = engine
+        self.methods = methods
+        self.webhook_url = webhook_url
+        self._lock = threading.Lock()
+
+    def process(self, quota_data: Optional[data.QuotaData]) -> list[Alert]:
+        with self._lock:
+            alerts = self.engine.evaluate(quota_data)
+        if alerts:
+            threading.Thread(target=self._deliver, args=(alerts,), daemon=True).start()
+        return alerts
+
+    def _deliver(self, alerts: list[Alert]):
+        if "dbus" in self.methods:
+            try:
+                if len(alerts) > MAX_NOTIFICATIONS_PER_POLL:
+                    worst = max(alerts, key=lambda a: SEVERITY_URGENCY.get(a.rule.severity, 1))
+                    lines = [_describe(a)[0] for a in alerts]
+                    notify_dbus(f"{len(alerts)} quota alerts", "\n".join(lines), worst.rule.severity)
+                else:
+                    for alert in alerts:
+                        notify_dbus(*_describe(alert), alert.rule.severity)
+            except Exception as e:
+                print(f"Notification error: {e}", file=sys.stderr)
+
+        if "webhook" in self.methods and self.webhook_url:
+            try:
+                post_webhook(self.webhook_url, alerts)
+            except Exception as e:
+                print(f"Webhook error: {e}", file=sys.stderr)
+
+
+def notifier_from_config() -> Optional[AlertNotifier]:
+    """Build the configured notifier, or None when alerting is disabled."""
+    cfg = CONFIG["alerts"]
+    if not cfg["enabled"]:
+        return None
+    rules = [AlertRule(**rule) for rule in cfg["rules"]]
+    engine = AlertEngine(rules, float(cfg["hysteresis"]))
+    return AlertNotifier(engine, list(cfg["methods"]), cfg["webhook_url"])
@@ -0,0 +1,155 @@
+"""GTK application wrapper and signal handling for the overlay."""
+
+import gi
+gi.require_version('Gtk', '4.0')
+
+from gi.repository import Gtk, GLib
+import atexit
+import os
+import signal
+from pathlib import Path
+from typing import Optional
+
+from .overlay import QuotaOverlay
+from .tray_manager import start_tray_process
+
+
+_window = None
+
+
+def pid_path() -> Path:
+    """Pidfile quota-monitor-toggle/-visibility signal, so headless modes
+    sharing the `src.main` command line are never targeted."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return Path(runtime_dir) / "quota-monitor.pid"
+
+
+def write_pidfile():
+    path = pid_path()
+    pid = str(os.getpid())
+    path.write_text(pid + "\n")
+
+    def remove():
+        # Leave the file alone if a newer overlay has taken it over.
+        try:
+            if path.read_text().strip() == pid:
+                path.unlink()
+        except OSError:
+            pass
+
+    atexit.register(remove)
+
+
+def toggle_handler(signum, frame):
+    global _window
+    if _window:
+        GLib.idle_add(_window.toggle_input)
+
+
+def visibility_handler(signum, frame):
+    global _window
+    if _window:
+        GLib.idle_add(_window.toggle_visibility)
+
+
+def quit_handler(signum, frame):
+    GLib.idle_add(Gtk.Application.get_default().quit)
+
+
+class App(Gtk.Application):
+    def __init__(
+        self,
+        use_daemon: bool = False,
+        renderer: Optional[str] = None,
+        bench_frames: int = 0,
+        replay_path: Optional[str] = None,
+        replay_speed: float = 1.0,
+        soak_cycles: int = 0,
+        soak_max_growth_mb: float = 8.0,
+    ):
+        super().__init__(application_id=None)
+        self.use_daemon = use_daemon
+        self.renderer = renderer
+        self.bench_frames = bench_frames
+        self.replay_path = replay_path
+        self.replay_speed = replay_speed
+        self.soak_cycles = soak_cycles
+        self.soak_max_growth_mb = soak_max_growth_mb
+        self.exit_status = 0
+
+    def do_activate(self):
+        global _window
+        if self.bench_frames:
+            self._start_benchmark()
+            return
+        if self.soak_cycles:
+            self._start_soak()
+            return
+        if self.replay_path:
+            _window = QuotaOverlay(self, renderer=self.renderer, poll=False)
+            _window.present()
+            _window.follow_replay(self.replay_path, self.replay_speed)
+            return
+        _window = QuotaOverlay(self, use_daemon=self.use_daemon, renderer=self.renderer)
+        _window.present()
+        write_pidfile()
+        start_tray_process(os.getpid())
+
+    def _start_benchmark(self):
+        from . import data
+        from .render_bench import RenderBenchmark
+
+        window = QuotaOverlay(self, renderer=self.renderer, poll=False)
+        window.present()
+        if self.replay_path:
+            from .replay import first_snapshot
+
+            quota_data = first_snapshot(self.replay_path)
+        else:
+            quota_data = data.fetch_quota_data()
+        RenderBenchmark(window, self.bench_frames, quota_data).start()
+
+    def _start_soak(self):
+        from .soak import SoakTest
+
+        window = QuotaOverlay(self, renderer=self.renderer, poll=False)
+        window.present()
+        soak = SoakTest(self.soak_cycles, window.update_ui, self.soak_max_growth_mb)
+
+        def step():
+            if soak.run_cycle():
+                return True
+            self.exit_status = 0 if soak.report() else 1
+            self.quit()
+            return False
+
+        soak.start()
+        # Low priority so every cycle's layout and paint run before the next.
+        GLib.idle_add(step, priority=GLib.PRIORITY_LOW)
+
+
+def run_overlay(
+    use_daemon: bool = False,
+    renderer: Optional[str] = None,
+    bench_frames: int = 0,
+    replay_path: Optional[str] = None,
+    replay_speed: float = 1.0,
+    soak_cycles: int = 0,
+    soak_max_growth_mb: float = 8.0,
+) -> int:
+    signal.signal(signal.SIGINT, quit_handler)
+    signal.signal(signal.SIGTERM, quit_handler)
+    signal.signal(signal.SIGUSR1, toggle_handler)
+    signal.signal(signal.SIGUSR2, visibility_handler)
+
+    app = App(
+        use_daemon,
+        renderer,
+        bench_frames,
+        replay_path,
+        replay_speed,
+        soak_cycles,
+        soak_max_growth_mb,
+    )
+    app.run(None)
+    return app.exit_status
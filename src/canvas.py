@@ -0,0 +1,491 @@
+"""Single custom-drawn overlay renderer.
+
+Draws every provider, tab and quota row inside one Gtk.Widget instead of a
+tree of Gtk.Box/Gtk.Label widgets. Pango layouts are cached by markup, each
+row keeps its own render node, and an update only rebuilds the nodes of
+rows whose content changed. Styling mirrors ui.get_css.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import gi
+
+gi.require_version("Gtk", "4.0")
+gi.require_version("Gsk", "4.0")
+gi.require_version("Graphene", "1.0")
+from gi.repository import Gtk, Gdk, Gsk, Graphene, Pango
+
+from .config import CONFIG
+from . import ui
+
+
+# Box model constants from ui.get_css / overlay.py.
+CONTENT_PADDING = 10  # .overlay-content padding
+ROW_SPACING = 2  # content_box spacing
+ROW_INNER_SPACING = 8  # quota row spacing between info and reset time
+TAB_SPACING = 6  # .credential-tabs spacing
+TAB_PAD_X, TAB_PAD_Y = 4, 1  # .cred-tab padding
+TAB_RADIUS = 3
+TABS_MARGIN_BOTTOM = 2
+HEADER_MARGIN_Y = 1  # .provider-name margin-top / margin-bottom
+
+MONO_FAMILY = "JetBrains Mono, Fira Code, Cascadia Code, monospace"
+
+# (family, scale, bold) per text style, matching the font rules in get_css.
+FONTS = {
+    "provider": (None, 0.78, True),
+    "quota": (MONO_FAMILY, 0.72, False),
+    "reset": ("JetBrains Mono, Fira Code, monospace", 0.72, True),
+    "tab": ("JetBrains Mono, monospace", 0.65, True),
+    "offline": (None, 1.0, False),
+}
+
+FLASH_RGB = {
+    "ok": (76, 175, 80),
+    "warn": (255, 152, 0),
+    "critical": (244, 67, 54),
+}
+FLASH_PERIOD = 0.5  # tab-flash-* animation duration
+FLASH_ITERATIONS = 10
+
+
+def _rgba(spec: str) -> Gdk.RGBA:
+    rgba = Gdk.RGBA()
+    rgba.parse(spec)
+    return rgba
+
+
+@dataclass
+class TabSpec:
+    cred_key: str
+    markup: str
+    active: bool
+    flash: Optional[str]
+
+
+@dataclass
+class RowSpec:
+    """Content of one drawn row; rows that compare equal are not redrawn."""
+
+    kind: str  # "summary", "tabs", "header", "quota" or "offline"
+    provider: str = ""
+    markup: str = ""
+    reset: str = ""
+    tabs: list[TabSpec] = field(default_factory=list)
+    cred_key: str = ""  # credential a summary row selects
+
+
+@dataclass
+class _Row:
+    spec: RowSpec
+    y: float = 0
+    width: float = 0
+    height: float = 0
+    node: Optional[Gsk.RenderNode] = None
+    # Clickable (x, y, w, h, cred_key) relative to the row origin: one per
+    # tab, or the whole row for headers and summary rows.
+    hit_rects: list[tuple[float, float, float, float, str]] = field(default_factory=list)
+
+
+def provider_rows(
+    provider_name: str,
+    cred_count: int,
+    credentials: list,
+    selected_key: Optional[str],
+    flash_statuses: dict[str, str],
+    display_groups: list,
+    countdown: Callable[[Optional[str]], str],
+    colors: dict,
+    collapsed: bool = False,
+    worst: Optional[tuple[float, int]] = None,
+) -> list[RowSpec]:
+    """Row specs equivalent to make_provider_header + make_quota_row.
+
+    A collapsed provider is a single header row.
+    """
+    header = RowSpec(
+        "header",
+        provider_name,
+        ui.provider_header_markup(provider_name, cred_count, collapsed, worst, colors),
+    )
+    if collapsed:
+        return [header]
+
+    rows = []
+    if credentials and len(credentials) > 1:
+        tabs = [
+            TabSpec(
+                cred_key=c.key,
+                markup=ui.cred_tab_markup(c),
+                active=c.key == selected_key,
+                flash=flash_statuses.get(c.key),
+            )
+            for c in credentials
+        ]
+        rows.append(RowSpec("tabs", provider_name, tabs=tabs))
+
+    rows.append(header)
+    for group in display_groups:
+        rows.append(
+            RowSpec(
+                "quota",
+                provider_name,
+                ui.quota_line_markup(
+                    group.name,
+                    group.remaining,
+                    group.max_requests,
+                    group.remaining_pct or 0,
+                    group.severity,
+                    colors,
+                ),
+                countdown(group.reset_time_iso),
+            )
+        )
+    return rows
+
+
+def summary_rows(pairs: list, colors: dict) -> list[RowSpec]:
+    """Row specs for the worst-N summary, from layout.worst_credentials."""
+    return [
+        RowSpec(
+            "summary",
+            provider.name,
+            ui.summary_row_markup(provider.name, cred, colors),
+            cred_key=cred.key,
+        )
+        for provider, cred in pairs
+    ]
+
+
+class QuotaCanvas(Gtk.Widget):
+    """Draws the whole overlay content in a single widget."""
+
+    def __init__(
+        self,
+        on_tab_click: Optional[Callable[[str, str], None]] = None,
+        on_header_click: Optional[Callable[[str], None]] = None,
+        on_summary_click: Optional[Callable[[str, str], None]] = None,
+    ):
+        super().__init__()
+        self.on_tab_click = on_tab_click
+        self.on_header_click = on_header_click
+        self.on_summary_click = on_summary_click
+        self._rows: list[_Row] = []
+        self._layouts: dict[tuple[str, str], Pango.Layout] = {}
+        self._fonts: dict[str, Pango.FontDescription] = {}
+        self._width = 0.0
+        self._height = 0.0
+        self._flash_started: dict[tuple[str, str, str], float] = {}
+        self._tick_id = 0
+        self._hit_rects: tuple[tuple[float, float, float, float], ...] = ()
+        # Whether the last set_rows moved, added or removed any clickable area.
+        self.hits_moved = False
+
+        appearance = CONFIG["appearance"]
+        self._text_opacity = float(appearance["text_opacity"])
+        self._reset_color = _rgba("rgba(255, 200, 100, 0.9)")
+        self._offline_color = _rgba(CONFIG["colors"]["critical"])
+        self._tab_text = _rgba("rgba(255, 255, 255, 0.9)")
+        self._tab_bg = _rgba("rgba(255, 255, 255, 0.05)")
+        self._tab_active_bg = _rgba("rgba(255, 255, 255, 0.15)")
+        self._tab_active_border = _rgba("rgba(255, 255, 255, 0.2)")
+
+        click = Gtk.GestureClick()
+        click.connect("released", self._on_released)
+        self.add_controller(click)
+
+    # Layout
+
+    def _font(self, style: str) -> Pango.FontDescription:
+        font = self._fonts.get(style)
+        if font is None:
+            family, scale, bold = FONTS[style]
+            base = self.get_pango_context().get_font_description()
+            font = base.copy()
+            if family:
+                font.set_family(family)
+            font.set_size(int(base.get_size() * scale))
+            if bold:
+                font.set_weight(Pango.Weight.BOLD)
+            self._fonts[style] = font
+        return font
+
+    def _layout(self, style: str, markup: str) -> Pango.Layout:
+        key = (style, markup)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = self.create_pango_layout(None)
+            layout.set_font_description(self._font(style))
+            layout.set_markup(markup, -1)
+            self._layouts[key] = layout
+        return layout
+
+    @staticmethod
+    def _size(layout: Pango.Layout) -> tuple[float, float]:
+        _, logical = layout.get_pixel_extents()
+        return logical.width, logical.height
+
+    def _measure_row(self, row: _Row):
+        spec = row.spec
+        row.hit_rects = []
+        if spec.kind == "tabs":
+            # Only the active tab has a 1px border; the box stretches all
+            # tabs to the tallest one.
+            sizes = []
+            for tab in spec.tabs:
+                w, h = self._size(self._layout("tab", tab.markup))
+                border = 2 if tab.active else 0
+                sizes.append((w + 2 * TAB_PAD_X + border, h + 2 * TAB_PAD_Y + border))
+            height = max((h for _, h in sizes), default=0)
+            x = 0.0
+            for (tw, _), tab in zip(sizes, spec.tabs):
+                row.hit_rects.append((x, 0, tw, height, tab.cred_key))
+                x += tw + TAB_SPACING
+            row.width = max(0.0, x - TAB_SPACING)
+            row.height = height + TABS_MARGIN_BOTTOM
+        elif spec.kind == "header":
+            w, h = self._size(self._layout("provider", spec.markup))
+            row.width, row.height = w, h + 2 * HEADER_MARGIN_Y
+            row.hit_rects.append((0, 0, row.width, row.height, ""))
+        elif spec.kind == "summary":
+            row.width, row.height = self._size(self._layout("quota", spec.markup))
+            row.hit_rects.append((0, 0, row.width, row.height, spec.cred_key))
+        elif spec.kind == "quota":
+            w, h = self._size(self._layout("quota", spec.markup))
+            if spec.reset:
+                rw, rh = self._size(self._layout("reset", f"<tt>{spec.reset}</tt>"))
+                w += ROW_INNER_SPACING + rw
+                h = max(h, rh)
+            row.width, row.height = w, h
+        else:
+            row.width, row.height = self._size(self._layout("offline", spec.markup))
+
+    def set_rows(self, specs: list[RowSpec], now: float):
+        """Replace the drawn content, rebuilding only rows that changed."""
+        old_rows = self._rows
+        rows = []
+        for i, spec in enumerate(specs):
+            if i < len(old_rows) and old_rows[i].spec == spec:
+                rows.append(old_rows[i])
+                continue
+            row = _Row(spec)
+            self._measure_row(row)
+            rows.append(row)
+
+        self._rows = rows
+        self._stack()
+        self._track_flashes(now)
+        self._prune_layouts()
+
+    def _stack(self):
+        """Position rows vertically and refresh size and tab rectangles."""
+        # A provider's tab row sits directly on its header.
+        y = 0.0
+        width = 0.0
+        prev = None
+        for row in self._rows:
+            if prev is not None:
+                y += 0 if prev.spec.kind == "tabs" else ROW_SPACING
+            row.y = y
+            y += row.height
+            width = max(width, row.width)
+            prev = row
+
+        hit_rects = self._collect_hit_rects()
+        self.hits_moved = hit_rects != self._hit_rects
+        self._hit_rects = hit_rects
+
+        if y != self._height or width != self._width:
+            self._height, self._width = y, width
+            self.queue_resize()
+        else:
+            self.queue_draw()
+
+    def set_offline(self, now: float):
+        self.set_rows([RowSpec("offline", markup="offline")], now)
+
+    def _prune_layouts(self):
+        used = set()
+        for row in self._rows:
+            spec = row.spec
+            if spec.kind == "tabs":
+                used.update(("tab", t.markup) for t in spec.tabs)
+            elif spec.kind == "header":
+                used.add(("provider", spec.markup))
+            elif spec.kind in ("quota", "summary"):
+                used.add(("quota", spec.markup))
+                if spec.reset:
+                    used.add(("reset", f"<tt>{spec.reset}</tt>"))
+            else:
+                used.add(("offline", spec.markup))
+        if len(used) != len(self._layouts):
+            self._layouts = {k: v for k, v in self._layouts.items() if k in used}
+
+    def do_measure(self, orientation, for_size):
+        if orientation == Gtk.Orientation.HORIZONTAL:
+            size = math.ceil(self._width) + 2 * CONTENT_PADDING
+            return 0, size, -1, -1
+        size = math.ceil(self._height) + 2 * CONTENT_PADDING
+        return size, size, -1, -1
+
+    def do_css_changed(self, change):
+        Gtk.Widget.do_css_changed(self, change)
+        self._fonts.clear()
+        self._layouts.clear()
+        for row in self._rows:
+            row.node = None
+            self._measure_row(row)
+        self._stack()
+
+    # Flashing tabs
+
+    def _track_flashes(self, now: float):
+        active = set()
+        for row in self._rows:
+            for tab in row.spec.tabs:
+                if tab.flash:
+                    key = (row.spec.provider, tab.cred_key, tab.flash)
+                    active.add(key)
+                    self._flash_started.setdefault(key, now)
+        self._flash_started = {k: v for k, v in self._flash_started.items() if k in active}
+
+        if self._flash_started and not self._tick_id:
+            self._tick_id = self.add_tick_callback(self._on_tick)
+
+    def _flash_alpha(self, provider: str, tab: TabSpec, now: float) -> float:
+        started = self._flash_started.get((provider, tab.cred_key, tab.flash))
+        if started is None:
+            return 0.0
+        elapsed = now - started
+        if elapsed >= FLASH_PERIOD * FLASH_ITERATIONS:
+            return 0.0
+        phase = (elapsed % FLASH_PERIOD) / FLASH_PERIOD
+        return 0.7 * (0.5 - 0.5 * math.cos(2 * math.pi * phase))
+
+    def _on_tick(self, widget, frame_clock) -> bool:
+        now = frame_clock.get_frame_time() / 1_000_000
+        running = any(
+            now - started < FLASH_PERIOD * FLASH_ITERATIONS
+            for started in self._flash_started.values()
+        )
+        for row in self._rows:
+            if row.spec.kind == "tabs" and any(t.flash for t in row.spec.tabs):
+                row.node = None
+        self.queue_draw()
+        if not running:
+            self._tick_id = 0
+            return False
+        return True
+
+    # Drawing
+
+    def _rounded(self, x, y, w, h, radius) -> Gsk.RoundedRect:
+        rect = Graphene.Rect().init(x, y, w, h)
+        return Gsk.RoundedRect().init_from_rect(rect, radius)
+
+    def _draw_text(self, snapshot: Gtk.Snapshot, layout: Pango.Layout, x: float, y: float, color):
+        snapshot.save()
+        snapshot.translate(Graphene.Point().init(x, y))
+        snapshot.append_layout(layout, color)
+        snapshot.restore()
+
+    def _draw_row(self, row: _Row, now: float) -> Optional[Gsk.RenderNode]:
+        snapshot = Gtk.Snapshot()
+        spec = row.spec
+        fg = self.get_color()
+
+        if spec.kind == "tabs":
+            for (x, y, w, h, _), tab in zip(row.hit_rects, spec.tabs):
+                rounded = self._rounded(x, y, w, h, TAB_RADIUS)
+                snapshot.push_rounded_clip(rounded)
+                bounds = Graphene.Rect().init(x, y, w, h)
+                snapshot.append_color(self._tab_active_bg if tab.active else self._tab_bg, bounds)
+                alpha = self._flash_alpha(spec.provider, tab, now) if tab.flash else 0.0
+                if alpha > 0:
+                    r, g, b = FLASH_RGB.get(tab.flash, FLASH_RGB["ok"])
+                    snapshot.append_color(_rgba(f"rgba({r}, {g}, {b}, {alpha:.3f})"), bounds)
+                snapshot.pop()
+                if tab.active:
+                    border = self._tab_active_border
+                    snapshot.append_border(rounded, [1, 1, 1, 1], [border] * 4)
+                layout = self._layout("tab", tab.markup)
+                tw, th = self._size(layout)
+                self._draw_text(
+                    snapshot,
+                    layout,
+                    x + (w - tw) / 2,
+                    y + (h - th) / 2,
+                    self._tab_text,
+                )
+        elif spec.kind == "header":
+            snapshot.push_opacity(self._text_opacity)
+            provider_color = _rgba(CONFIG["colors"]["provider"])
+            self._draw_text(
+                snapshot, self._layout("provider", spec.markup), 0, HEADER_MARGIN_Y, provider_color
+            )
+            snapshot.pop()
+        elif spec.kind in ("quota", "summary"):
+            layout = self._layout("quota", spec.markup)
+            snapshot.push_opacity(self._text_opacity)
+            self._draw_text(snapshot, layout, 0, 0, fg)
+            snapshot.pop()
+            if spec.reset:
+                w, _ = self._size(layout)
+                self._draw_text(
+                    snapshot,
+                    self._layout("reset", f"<tt>{spec.reset}</tt>"),
+                    w + ROW_INNER_SPACING,
+                    0,
+                    self._reset_color,
+                )
+        else:
+            self._draw_text(snapshot, self._layout("offline", spec.markup), 0, 0, self._offline_color)
+
+        return snapshot.to_node()
+
+    def do_snapshot(self, snapshot: Gtk.Snapshot):
+        clock = self.get_frame_clock()
+        now = clock.get_frame_time() / 1_000_000 if clock else 0.0
+        for row in self._rows:
+            if row.node is None:
+                row.node = self._draw_row(row, now)
+            if row.node is None:
+                continue
+            snapshot.save()
+            snapshot.translate(Graphene.Point().init(CONTENT_PADDING, CONTENT_PADDING + row.y))
+            snapshot.append_node(row.node)
+            snapshot.restore()
+
+    # Hit testing
+
+    def _collect_hit_rects(self) -> tuple[tuple[float, float, float, float], ...]:
+        rects = []
+        for row in self._rows:
+            for x, y, w, h, _ in row.hit_rects:
+                rects.append((CONTENT_PADDING + x, CONTENT_PADDING + row.y + y, w, h))
+        return tuple(rects)
+
+    def hit_rects(self) -> tuple[tuple[float, float, float, float], ...]:
+        """Clickable rectangles in widget coordinates, for the input region."""
+        return self._hit_rects
+
+    def _on_released(self, gesture, n_press, x, y):
+        for row in self._rows:
+            for tx, ty, w, h, cred_key in row.hit_rects:
+                left = CONTENT_PADDING + tx
+                top = CONTENT_PADDING + row.y + ty
+                if left <= x < left + w and top <= y < top + h:
+                    self._dispatch_click(row.spec, cred_key)
+                    return
+
+    def _dispatch_click(self, spec: RowSpec, cred_key: str):
+        if spec.kind == "tabs" and self.on_tab_click:
+            self.on_tab_click(spec.provider, cred_key)
+        elif spec.kind == "header" and self.on_header_click:
+            self.on_header_click(spec.provider)
+        elif spec.kind == "summary" and self.on_summary_click:
+            self.on_summary_click(spec.provider, cred_key)
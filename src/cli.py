@@ -0,0 +1,153 @@
+"""Terminal renderer for quota snapshots.
+
+Never imports gi, so it starts fast over SSH or from a status bar.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from typing import Callable, Optional, TextIO
+
+from .config import CONFIG
+from . import data
+from .severity import NAMES as SEVERITY_NAMES
+
+
+ANSI_COLORS = {
+    "ok": "\x1b[32m",
+    "warn": "\x1b[33m",
+    "critical": "\x1b[31m",
+    "provider": "\x1b[1;34m",
+    "dim": "\x1b[2m",
+    "reset_time": "\x1b[1;33m",
+}
+ANSI_RESET = "\x1b[0m"
+
+
+def _paint(text: str, style: str, color: bool) -> str:
+    if not color:
+        return text
+    return f"{ANSI_COLORS[style]}{text}{ANSI_RESET}"
+
+
+def format_quota_line(group: data.QuotaGroup, color: bool = False) -> str:
+    """Same layout as ui.make_quota_row: name  remaining/max  pct%  reset."""
+    pct = group.remaining_pct or 0
+    status = SEVERITY_NAMES[group.severity]
+    line = (
+        f"{_paint(f'{group.name[:10]:10s}', status, color)} "
+        f"{group.remaining:>5}/{group.max_requests:<5} "
+        f"{_paint(f'{int(pct):>3}%', status, color)}"
+    )
+    countdown = data.format_countdown(group.reset_time_iso)
+    if countdown:
+        line += f"  {_paint(countdown, 'reset_time', color)}"
+    return line
+
+
+def render_table(quota_data: Optional[data.QuotaData], color: bool = False) -> list[str]:
+    """Render a snapshot as a list of terminal lines."""
+    if quota_data is None:
+        return [_paint("offline", "critical", color)]
+
+    lines = []
+    for provider in quota_data.providers:
+        lines.append(
+            f"{_paint(provider.name.upper(), 'provider', color)} "
+            f"{_paint(f'({provider.credential_count})  ${provider.approx_cost:.2f}', 'dim', color)}"
+        )
+        if provider.credentials:
+            for cred in provider.credentials:
+                lines.append(
+                    f"  {_paint(f'[{cred.id}{cred.tier}]', 'dim', color)} "
+                    f"{cred.name} {_paint(cred.status, 'dim', color)}"
+                )
+                for group in cred.quota_groups:
+                    lines.append(f"    {format_quota_line(group, color)}")
+        else:
+            groups = sorted(
+                provider.quota_groups, key=data.sort_quota_groups(provider.name)
+            )
+            for group in groups:
+                lines.append(f"  {format_quota_line(group, color)}")
+
+    lines.append(
+        f"{_paint(f'{quota_data.total_credentials} creds', 'dim', color)}  "
+        f"{_paint(f'$ {quota_data.total_cost:.2f}', 'ok', color)}"
+    )
+    return lines
+
+
+def render_json(quota_data: Optional[data.QuotaData]) -> str:
+    if quota_data is None:
+        return "null"
+    return json.dumps(data.quota_data_to_dict(quota_data), indent=2)
+
+
+class LineDiffWriter:
+    """Redraws a terminal frame, rewriting only the lines that changed."""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.previous: list[str] = []
+
+    def start(self):
+        # Clear screen, home cursor, hide cursor.
+        self.out.write("\x1b[2J\x1b[H\x1b[?25l")
+        self.out.flush()
+
+    def stop(self):
+        self.out.write(f"\x1b[{len(self.previous) + 1};1H\x1b[?25h")
+        self.out.flush()
+
+    def draw(self, lines: list[str]):
+        chunks = []
+        for i, line in enumerate(lines):
+            if i < len(self.previous) and self.previous[i] == line:
+                continue
+            chunks.append(f"\x1b[{i + 1};1H{line}\x1b[K")
+        if len(lines) < len(self.previous):
+            chunks.append(f"\x1b[{len(lines) + 1};1H\x1b[J")
+        if chunks:
+            self.out.write("".join(chunks))
+            self.out.flush()
+        self.previous = list(lines)
+
+
+def watch(
+    fetch: Callable[[], Optional[data.QuotaData]],
+    out: TextIO = sys.stdout,
+    color: bool = True,
+) -> None:
+    """Poll and redraw in place until interrupted."""
+    interval = CONFIG["server"]["refresh_interval_ms"] / 1000
+    writer = LineDiffWriter(out)
+    writer.start()
+    try:
+        while True:
+            writer.draw(render_table(fetch(), color))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.stop()
+
+
+def run_cli(
+    fetch: Callable[[], Optional[data.QuotaData]],
+    as_json: bool = False,
+    watch_mode: bool = False,
+) -> int:
+    color = sys.stdout.isatty()
+    if watch_mode:
+        watch(fetch, sys.stdout, color)
+        return 0
+
+    quota_data = fetch()
+    if as_json:
+        print(render_json(quota_data))
+    else:
+        print("\n".join(render_table(quota_data, color)))
+    return 0 if quota_data is not None else 1
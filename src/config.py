@@ -13,11 +13,28 @@ DEFAULT_CONFIG = {
         "api_key": "VerysecretKey",
         "refresh_interval_ms": 5000,
     },
+    "filter": {
+        "providers": [],
+        "credentials": [],
+        "query_params": False,
+    },
     "appearance": {
         "background_opacity": 0.55,
         "text_opacity": 0.85,
         "width": 340,
         "corner_radius": 10,
+        "renderer": "widgets",
+    },
+    "severity": {
+        "critical": 10,
+        "warn": 30,
+        "providers": {},
+    },
+    "layout": {
+        "summary_rows": 0,
+        "collapsed": [],
+        "auto_collapse_above": 0,
+        "max_tabs": 0,
     },
     "position": {
         "anchor": "top-right",
@@ -28,6 +45,34 @@ DEFAULT_CONFIG = {
     },
     "behavior": {
         "click_through": True,
+        "hidden_polling": "alerts",
+        "hidden_refresh_interval_ms": 60000,
+    },
+    "daemon": {
+        "socket_path": "",
+        "use_daemon": False,
+    },
+    "alerts": {
+        "enabled": False,
+        "methods": ["dbus"],
+        "webhook_url": "",
+        "hysteresis": 5.0,
+        "rules": [
+            {"threshold": 30, "severity": "warn"},
+            {"threshold": 10, "severity": "critical"},
+        ],
+    },
+    "debug": {
+        "perf": False,
+        "perf_hud": False,
+        "tracemalloc_frames": 0,
+    },
+    "waybar": {
+        "format": "{pct}% {group}",
+    },
+    "metrics": {
+        "host": "127.0.0.1",
+        "port": 9464,
     },
     "colors": {
         "ok": "#4caf50",
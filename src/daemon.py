@@ -0,0 +1,219 @@
+"""Shared quota cache daemon and its Unix socket client.
+
+The daemon polls the proxy once per refresh interval and serves the parsed
+snapshot to any number of local clients, so proxy load does not grow with
+the number of overlays, bars or scripts attached.
+
+Protocol (newline-delimited, one request per connection):
+    get\\n    -> one JSON snapshot line, then the connection is closed
+    perf\\n   -> one JSON line of timing histograms (with --perf)
+    memory\\n -> one JSON line of RSS, GC and tracemalloc statistics
+    watch\\n  -> the current snapshot line, then one line per change
+A snapshot line is the JSON of data.quota_data_to_dict, or ``null`` while
+the proxy is unreachable.
+"""
+
+from __future__ import annotations
+
+import errno
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+from .config import CONFIG
+from . import data
+from . import alerts
+from . import memory
+from .perf import PERF
+
+
+def socket_path() -> str:
+    """Resolve the daemon socket path from config or the XDG runtime dir."""
+    configured = CONFIG["daemon"]["socket_path"]
+    if configured:
+        return os.path.expanduser(configured)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or f"/tmp/quota-monitor-{os.getuid()}"
+    return str(Path(runtime_dir) / "quota-monitor.sock")
+
+
+def encode_snapshot(quota_data: Optional[data.QuotaData]) -> bytes:
+    if quota_data is None:
+        return b"null\n"
+    payload = json.dumps(data.quota_data_to_dict(quota_data), separators=(",", ":"))
+    return payload.encode() + b"\n"
+
+
+def decode_snapshot(line: bytes) -> Optional[data.QuotaData]:
+    raw = json.loads(line)
+    if raw is None:
+        return None
+    return data.quota_data_from_dict(raw)
+
+
+class SnapshotStore:
+    """Latest encoded snapshot plus a version counter clients can wait on."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._version = 0
+        self._payload = b"null\n"
+
+    def publish(self, payload: bytes) -> bool:
+        """Store a new snapshot; returns False if it is identical to the last one."""
+        with self._cond:
+            if self._version and payload == self._payload:
+                return False
+            self._payload = payload
+            self._version += 1
+            self._cond.notify_all()
+            return True
+
+    def current(self) -> tuple[int, bytes]:
+        with self._cond:
+            return self._version, self._payload
+
+    def wait_newer(self, version: int, timeout: float) -> tuple[int, bytes]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._version > version, timeout)
+            return self._version, self._payload
+
+
+class _SnapshotHandler(socketserver.StreamRequestHandler):
+    server: "QuotaDaemon"
+
+    def handle(self):
+        command = self.rfile.readline().strip().lower()
+        store = self.server.store
+
+        if command == b"get":
+            self.wfile.write(store.current()[1])
+            return
+
+        if command == b"perf":
+            self.wfile.write(json.dumps(PERF.to_dict()).encode() + b"\n")
+            return
+
+        if command == b"memory":
+            self.wfile.write(json.dumps(memory.memory_report()).encode() + b"\n")
+            return
+
+        if command != b"watch":
+            self.wfile.write(b'{"error":"unknown command"}\n')
+            return
+
+        version, payload = store.current()
+        try:
+            self.wfile.write(payload)
+            while not self.server.stopping.is_set():
+                new_version, payload = store.wait_newer(version, timeout=1.0)
+                if new_version == version:
+                    continue
+                version = new_version
+                self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class QuotaDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Polls the proxy and serves snapshots over a Unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.store = SnapshotStore()
+        self.stopping = threading.Event()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        if os.path.exists(path):
+            _remove_stale_socket(path)
+        super().__init__(path, _SnapshotHandler)
+        os.chmod(path, 0o600)
+
+    def poll_forever(self):
+        interval = CONFIG["server"]["refresh_interval_ms"] / 1000
+        notifier = alerts.notifier_from_config()
+        while not self.stopping.is_set():
+            quota_data = data.fetch_quota_data()
+            if notifier:
+                notifier.process(quota_data)
+            self.store.publish(encode_snapshot(quota_data))
+            self.stopping.wait(interval)
+
+    def serve(self):
+        poller = threading.Thread(target=self.poll_forever, daemon=True)
+        poller.start()
+        try:
+            self.serve_forever()
+        finally:
+            self.stopping.set()
+            self.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def stop(self):
+        self.stopping.set()
+        self.shutdown()
+
+
+def _remove_stale_socket(path: str):
+    """Unlink a socket left behind by a dead daemon; refuse to take over a live one."""
+    try:
+        _connect(path, 1).close()
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    raise OSError(errno.EADDRINUSE, "another quota daemon is serving", path)
+
+
+def _connect(path: str, timeout: Optional[float]) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(path)
+    return sock
+
+
+def fetch_from_daemon(path: Optional[str] = None) -> Optional[data.QuotaData]:
+    """One-shot read of the daemon's current snapshot."""
+    try:
+        with _connect(path or socket_path(), timeout=5) as sock:
+            sock.sendall(b"get\n")
+            with sock.makefile("rb") as stream:
+                return decode_snapshot(stream.readline())
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return None
+
+
+def watch_daemon(
+    on_snapshot: Callable[[Optional[data.QuotaData]], None],
+    path: Optional[str] = None,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """Call on_snapshot for every change pushed by the daemon.
+
+    Blocks until stop is set, reconnecting after the refresh interval if the
+    daemon goes away; on_snapshot(None) is called while it is unreachable.
+    """
+    stop = stop or threading.Event()
+    retry = CONFIG["server"]["refresh_interval_ms"] / 1000
+
+    while not stop.is_set():
+        try:
+            with _connect(path or socket_path(), timeout=None) as sock:
+                sock.sendall(b"watch\n")
+                with sock.makefile("rb") as stream:
+                    for line in stream:
+                        if stop.is_set():
+                            return
+                        on_snapshot(decode_snapshot(line))
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+        on_snapshot(None)
+        stop.wait(retry)
+
@@ -2,13 +2,33 @@
 
 from __future__ import annotations
 
+import gzip
+import http.client
 import json
+import sys
+import threading
+import urllib.parse
 import urllib.request
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
-from typing import Optional
+from fnmatch import fnmatchcase
+from typing import BinaryIO, Callable, Optional
 
 from .config import CONFIG
+from .perf import PERF
+from . import severity
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+QUOTA_STATS_PATH = "/v1/quota-stats"
+ACCEPT_ENCODING = "zstd, gzip" if zstandard else "gzip"
+
+# Called with every raw response body before it is decoded (see replay.py).
+BODY_HOOKS: list[Callable[[bytes], None]] = []
 
 
 @dataclass
@@ -18,16 +38,22 @@ class QuotaGroup:
     max_requests: int
     remaining_pct: Optional[float]
     reset_time_iso: Optional[str]
+    severity: int = severity.OK  # severity code, set once during parsing
 
 
 @dataclass
 class Credential:
-    id: int
-    name: str
+    id: int  # 1-based position in the proxy's list, used for tab labels
+    # Identity used for selection, flash, alert and metric state. Unlike the
+    # identifier it is unique per provider (a dict key) and always present,
+    # and it is stable when credentials are reordered.
+    key: str
+    name: str  # identifier, or the key when the proxy has none
     tier: str
     status: str
     quota_groups: list[QuotaGroup]
     worst_pct: float
+    severity: int = severity.OK  # severity of worst_pct
 
 
 @dataclass
@@ -38,6 +64,10 @@ class Provider:
     quota_groups: list[QuotaGroup]
     credentials: list[Credential]
 
+    def __post_init__(self):
+        # Built once per snapshot for O(1) selection and flash lookups.
+        self.credentials_by_key = {c.key: c for c in self.credentials}
+
 
 @dataclass
 class QuotaData:
@@ -46,6 +76,40 @@ class QuotaData:
     total_cost: float
 
 
+def quota_data_to_dict(quota_data: QuotaData) -> dict:
+    """Convert a snapshot into plain JSON-serialisable dicts."""
+    return asdict(quota_data)
+
+
+def quota_data_from_dict(raw: dict) -> QuotaData:
+    """Rebuild a snapshot produced by quota_data_to_dict."""
+    providers = []
+    for p in raw.get("providers", []):
+        credentials = [
+            Credential(
+                **{
+                    **c,
+                    "quota_groups": [QuotaGroup(**g) for g in c["quota_groups"]],
+                }
+            )
+            for c in p.get("credentials", [])
+        ]
+        providers.append(
+            Provider(
+                **{
+                    **p,
+                    "quota_groups": [QuotaGroup(**g) for g in p["quota_groups"]],
+                    "credentials": credentials,
+                }
+            )
+        )
+    return QuotaData(
+        providers=providers,
+        total_credentials=raw.get("total_credentials") or 0,
+        total_cost=raw.get("total_cost") or 0,
+    )
+
+
 def format_countdown(iso_str: Optional[str]) -> str:
     """Convert ISO timestamp to countdown string like '2h30m'."""
     if not iso_str or iso_str == "null":
@@ -108,142 +172,312 @@ def unix_to_iso(unix_ts: Optional[float]) -> Optional[str]:
         return None
 
 
-def fetch_quota_data() -> Optional[QuotaData]:
-    """Fetch data from the proxy API."""
-    server = CONFIG["server"]
-    url = f"http://{server['host']}:{server['port']}/v1/quota-stats"
+@dataclass(frozen=True)
+class QuotaFilter:
+    """Providers and credentials to keep; empty tuples keep everything.
 
-    try:
-        req = urllib.request.Request(url)
-        if server["api_key"]:
-            req.add_header("Authorization", f"Bearer {server['api_key']}")
-        with urllib.request.urlopen(req, timeout=5) as response:
-            data = json.loads(response.read().decode())
+    Credential patterns are fnmatch globs matched against both the proxy
+    credential key and its identifier.
+    """
 
-        providers = []
-        for pname, pdata in data.get("providers", {}).items():
-            provider_quota_groups = []
+    providers: tuple[str, ...] = ()
+    credentials: tuple[str, ...] = ()
 
-            p_quota_groups = pdata.get("quota_groups", {})
-            for gname, gdata in p_quota_groups.items():
-                display_name = gname
-                if pname.upper() == "GEMINI_CLI" and gname == "pro":
-                    display_name = "3-pro"
+    def __bool__(self) -> bool:
+        return bool(self.providers or self.credentials)
 
-                remaining = 0
-                max_requests = 0
-                remaining_pct = None
-                reset_at = None
+    def wants_provider(self, name: str) -> bool:
+        return not self.providers or name.lower() in self.providers
 
-                windows = gdata.get("windows", {})
-                for window_name, window_data in windows.items():
-                    remaining = window_data.get("total_remaining", 0)
-                    max_requests = window_data.get("total_max", 0)
-                    remaining_pct = window_data.get("remaining_pct")
+    def wants_credential(self, key: str, identifier: str) -> bool:
+        return not self.credentials or any(
+            fnmatchcase(key, pattern) or fnmatchcase(identifier, pattern)
+            for pattern in self.credentials
+        )
 
-                    if remaining_pct is None and max_requests > 0:
-                        remaining_pct = (remaining / max_requests) * 100
 
-                provider_quota_groups.append(
-                    QuotaGroup(
-                        name=display_name,
-                        remaining=remaining,
-                        max_requests=max_requests,
-                        remaining_pct=remaining_pct,
-                        reset_time_iso=None,
-                    )
+def filter_from_config() -> QuotaFilter:
+    cfg = CONFIG["filter"]
+    return QuotaFilter(
+        providers=tuple(p.lower() for p in cfg["providers"]),
+        credentials=tuple(cfg["credentials"]),
+    )
+
+
+def quota_stats_path(quota_filter: Optional[QuotaFilter] = None) -> str:
+    """Request path, with the filter as query parameters if the proxy takes them."""
+    if quota_filter is None:
+        quota_filter = filter_from_config()
+    if not (quota_filter and CONFIG["filter"]["query_params"]):
+        return QUOTA_STATS_PATH
+    params = {}
+    if quota_filter.providers:
+        params["providers"] = ",".join(quota_filter.providers)
+    if quota_filter.credentials:
+        params["credentials"] = ",".join(quota_filter.credentials)
+    return f"{QUOTA_STATS_PATH}?{urllib.parse.urlencode(params, safe=',*')}"
+
+
+def parse_quota_data(data: dict, quota_filter: Optional[QuotaFilter] = None) -> QuotaData:
+    """Build a QuotaData snapshot from a decoded /v1/quota-stats body.
+
+    Providers and credentials rejected by quota_filter are skipped before
+    any of their groups are built.
+    """
+    quota_filter = quota_filter or QuotaFilter()
+    providers = []
+    for pname, pdata in data.get("providers", {}).items():
+        if not quota_filter.wants_provider(pname):
+            continue
+        classify = severity.thresholds_for(pname).classify
+        provider_quota_groups = []
+
+        p_quota_groups = pdata.get("quota_groups", {})
+        for gname, gdata in p_quota_groups.items():
+            display_name = gname
+            if pname.upper() == "GEMINI_CLI" and gname == "pro":
+                display_name = "3-pro"
+
+            remaining = 0
+            max_requests = 0
+            remaining_pct = None
+            reset_at = None
+
+            windows = gdata.get("windows", {})
+            for window_name, window_data in windows.items():
+                remaining = window_data.get("total_remaining", 0)
+                max_requests = window_data.get("total_max", 0)
+                remaining_pct = window_data.get("remaining_pct")
+
+                if remaining_pct is None and max_requests > 0:
+                    remaining_pct = (remaining / max_requests) * 100
+
+            provider_quota_groups.append(
+                QuotaGroup(
+                    name=display_name,
+                    remaining=remaining,
+                    max_requests=max_requests,
+                    remaining_pct=remaining_pct,
+                    reset_time_iso=None,
+                    severity=classify(remaining_pct or 0),
                 )
+            )
+
+        credentials = []
+        creds_data = pdata.get("credentials", {})
+
+        cred_items = creds_data.items() if isinstance(creds_data, dict) else []
+
+        for i, (ckey, cdata) in enumerate(cred_items):
+            if not isinstance(cdata, dict):
+                continue
+
+            identifier = cdata.get("identifier", "unknown")
+            if identifier == "unknown":
+                identifier = ckey
+            if not quota_filter.wants_credential(str(ckey), identifier):
+                continue
 
-            credentials = []
-            creds_data = pdata.get("credentials", {})
+            c_quota_groups = []
+            worst_pct = 100.0
 
-            cred_items = creds_data.items() if isinstance(creds_data, dict) else []
+            group_usage = cdata.get("group_usage", {})
+            if not group_usage:
+                group_usage = cdata.get("model_groups", {})
+            if not group_usage:
+                group_usage = cdata.get("models", {})
 
-            for i, (ckey, cdata) in enumerate(cred_items):
-                if not isinstance(cdata, dict):
+            for gname, gdata in group_usage.items():
+                if not isinstance(gdata, dict):
                     continue
 
-                c_quota_groups = []
-                worst_pct = 100.0
-
-                group_usage = cdata.get("group_usage", {})
-                if not group_usage:
-                    group_usage = cdata.get("model_groups", {})
-                if not group_usage:
-                    group_usage = cdata.get("models", {})
-
-                for gname, gdata in group_usage.items():
-                    if not isinstance(gdata, dict):
-                        continue
-
-                    windows = gdata.get("windows", {})
-                    window_data = next(iter(windows.values())) if windows else {}
-
-                    remaining = window_data.get("remaining", 0)
-                    limit = window_data.get("limit", 0)
-
-                    pct = window_data.get("remaining_pct")
-                    if pct is None and limit > 0:
-                        pct = (remaining / limit) * 100
-                    if pct is None:
-                        pct = 0.0
-
-                    if pct < worst_pct:
-                        worst_pct = pct
-
-                    display_name = gname
-                    if pname.upper() == "GEMINI_CLI" and gname == "pro":
-                        display_name = "3-pro"
-
-                    reset_at = window_data.get("reset_at")
-                    reset_iso = unix_to_iso(reset_at)
-
-                    c_quota_groups.append(
-                        QuotaGroup(
-                            name=display_name,
-                            remaining=remaining,
-                            max_requests=limit,
-                            remaining_pct=float(pct),
-                            reset_time_iso=reset_iso,
-                        )
-                    )
+                windows = gdata.get("windows", {})
+                window_data = next(iter(windows.values())) if windows else {}
+
+                remaining = window_data.get("remaining", 0)
+                limit = window_data.get("limit", 0)
 
-                c_quota_groups.sort(key=sort_quota_groups(pname))
+                pct = window_data.get("remaining_pct")
+                if pct is None and limit > 0:
+                    pct = (remaining / limit) * 100
+                if pct is None:
+                    pct = 0.0
 
-                tier_val = cdata.get("tier") or "free"
-                tier_char = tier_val[0].lower()
+                if pct < worst_pct:
+                    worst_pct = pct
 
-                identifier = cdata.get("identifier", "unknown")
-                if identifier == "unknown":
-                    identifier = ckey
+                display_name = gname
+                if pname.upper() == "GEMINI_CLI" and gname == "pro":
+                    display_name = "3-pro"
 
-                credentials.append(
-                    Credential(
-                        id=i + 1,
-                        name=identifier,
-                        tier=tier_char,
-                        status=cdata.get("status", "active"),
-                        quota_groups=c_quota_groups,
-                        worst_pct=float(worst_pct),
+                reset_at = window_data.get("reset_at")
+                reset_iso = unix_to_iso(reset_at)
+
+                c_quota_groups.append(
+                    QuotaGroup(
+                        name=display_name,
+                        remaining=remaining,
+                        max_requests=limit,
+                        remaining_pct=float(pct),
+                        reset_time_iso=reset_iso,
+                        severity=classify(pct),
                     )
                 )
 
-            providers.append(
-                Provider(
-                    name=pname,
-                    credential_count=pdata.get("credential_count") or 0,
-                    approx_cost=pdata.get("approx_cost") or 0,
-                    quota_groups=provider_quota_groups,
-                    credentials=credentials,
+            c_quota_groups.sort(key=sort_quota_groups(pname))
+
+            tier_val = cdata.get("tier") or "free"
+            tier_char = tier_val[0].lower()
+
+            credentials.append(
+                Credential(
+                    id=i + 1,
+                    key=str(ckey),
+                    name=identifier,
+                    tier=tier_char,
+                    status=cdata.get("status", "active"),
+                    quota_groups=c_quota_groups,
+                    worst_pct=float(worst_pct),
+                    severity=classify(worst_pct),
                 )
             )
 
-        summary = data.get("summary", {})
-        return QuotaData(
-            providers=providers,
-            total_credentials=summary.get("total_credentials") or 0,
-            total_cost=summary.get("approx_total_cost") or 0,
+        providers.append(
+            Provider(
+                name=pname,
+                credential_count=pdata.get("credential_count") or 0,
+                approx_cost=pdata.get("approx_cost") or 0,
+                quota_groups=provider_quota_groups,
+                credentials=credentials,
+            )
         )
+
+    summary = data.get("summary", {})
+    return QuotaData(
+        providers=providers,
+        total_credentials=summary.get("total_credentials") or 0,
+        total_cost=summary.get("approx_total_cost") or 0,
+    )
+
+
+def decode_quota_data(body: bytes) -> QuotaData:
+    """Parse a raw /v1/quota-stats response body with the configured filter."""
+    with PERF.span("fetch.decode"):
+        payload = json.loads(body)
+    with PERF.span("fetch.parse"):
+        return parse_quota_data(payload, filter_from_config())
+
+
+def read_body(response: BinaryIO, content_encoding: Optional[str]) -> bytes:
+    """Read a response body, decompressing it as it streams off the socket.
+
+    Only the decompressed body is ever held in memory.
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return response.read()
+    if encoding == "gzip":
+        with gzip.GzipFile(fileobj=response) as stream:
+            body = stream.read()
+    elif encoding == "zstd" and zstandard is not None:
+        with zstandard.ZstdDecompressor().stream_reader(response) as stream:
+            body = stream.read()
+    else:
+        raise http.client.HTTPException(f"unsupported Content-Encoding: {encoding}")
+    # Drain anything after the compressed frame so keep-alive can continue.
+    response.read()
+    return body
+
+
+class ProxySession:
+    """Keep-alive HTTP connection to the proxy, reused across polls."""
+
+    def __init__(self, timeout: float = 5):
+        self.timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._lock = threading.Lock()
+
+    def _request(self, path: str) -> bytes:
+        server = CONFIG["server"]
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(
+                server["host"], server["port"], timeout=self.timeout
+            )
+            with PERF.span("fetch.connect"):
+                self._conn.connect()
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        if server["api_key"]:
+            headers["Authorization"] = f"Bearer {server['api_key']}"
+        with PERF.span("fetch.ttfb"):
+            self._conn.request("GET", path, headers=headers)
+            response = self._conn.getresponse()
+        with PERF.span("fetch.read"):
+            body = read_body(response, response.getheader("Content-Encoding"))
+        if response.status != 200:
+            raise http.client.HTTPException(f"HTTP {response.status} {response.reason}")
+        return body
+
+    def get(self, path: str) -> bytes:
+        with self._lock:
+            try:
+                return self._request(path)
+            except (
+                http.client.RemoteDisconnected,
+                http.client.CannotSendRequest,
+                BrokenPipeError,
+                ConnectionResetError,
+            ):
+                # The proxy dropped the idle keep-alive connection; reconnect once.
+                self.close()
+                return self._request(path)
+            except Exception:
+                self.close()
+                raise
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def run_body_hooks(body: bytes) -> None:
+    """Pass a body to every hook; a failing hook is logged, never fatal."""
+    for hook in BODY_HOOKS:
+        try:
+            hook(body)
+        except Exception as e:
+            print(f"Error: body hook {hook!r}: {e}", file=sys.stderr)
+
+
+def fetch_quota_data(session: Optional[ProxySession] = None) -> Optional[QuotaData]:
+    """Fetch data from the proxy API.
+
+    Pass a ProxySession to reuse one keep-alive connection across polls.
+    """
+    with PERF.span("fetch.total"):
+        return _fetch_quota_data(session)
+
+
+def _fetch_quota_data(session: Optional[ProxySession]) -> Optional[QuotaData]:
+    server = CONFIG["server"]
+
+    try:
+        path = quota_stats_path()
+        if session is not None:
+            body = session.get(path)
+        else:
+            url = f"http://{server['host']}:{server['port']}{path}"
+            req = urllib.request.Request(url, headers={"Accept-Encoding": ACCEPT_ENCODING})
+            if server["api_key"]:
+                req.add_header("Authorization", f"Bearer {server['api_key']}")
+            # urlopen connects and waits for headers in one call.
+            with PERF.span("fetch.ttfb"):
+                response = urllib.request.urlopen(req, timeout=5)
+            with response:
+                with PERF.span("fetch.read"):
+                    body = read_body(response, response.headers.get("Content-Encoding"))
+        run_body_hooks(body)
+        return decode_quota_data(body)
     except Exception as e:
-        print(f"Error: {e}")
+        print(f"Error: {e}", file=sys.stderr)
         return None
@@ -0,0 +1,57 @@
+"""JSON diagnostic dumps triggered by signals.
+
+Each kind of dump (perf, memory) is bound to a real-time signal and written
+to $XDG_RUNTIME_DIR/quota-monitor-<kind>-<pid>.json. Python runs signal
+handlers on the main thread between bytecodes, possibly while that thread
+holds a lock the report needs (e.g. PERF._lock inside Perf.record()), so
+handlers only queue the request (SimpleQueue.put is reentrant) and a single
+worker thread builds and writes the report.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import signal
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+
+_builders: dict[str, Callable[[], dict]] = {}
+_requests: queue.SimpleQueue = queue.SimpleQueue()
+_worker: Optional[threading.Thread] = None
+
+
+def dump_path(kind: str) -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return str(Path(runtime_dir) / f"quota-monitor-{kind}-{os.getpid()}.json")
+
+
+def write_dump(kind: str, report: dict, path: Optional[str] = None) -> str:
+    path = path or dump_path(kind)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def _work():
+    while True:
+        kind = _requests.get()
+        try:
+            path = write_dump(kind, _builders[kind]())
+            print(f"{kind} report written to {path}", file=sys.stderr)
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+
+
+def install_dump_signal(signum: int, kind: str, build: Callable[[], dict]) -> None:
+    """Write build() to dump_path(kind) whenever signum arrives."""
+    global _worker
+    _builders[kind] = build
+    if _worker is None:
+        _worker = threading.Thread(target=_work, name="dumps", daemon=True)
+        _worker.start()
+    signal.signal(signum, lambda s, frame: _requests.put(kind))
@@ -3,25 +3,42 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
-from typing import Optional, TYPE_CHECKING, Sequence
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, TYPE_CHECKING, Sequence
+
+from .severity import NAMES as STATUS_NAMES
 
 if TYPE_CHECKING:
     from .data import Credential
 
 
+NO_FLASH = -1
+
+FLASH_SECONDS = 5.0
+
+
+@dataclass
+class CredentialFlash:
+    """Last seen group percentages and status codes for one credential."""
+
+    names: tuple[str, ...]
+    pcts: tuple[float, ...]
+    codes: bytes
+    flash_code: int = NO_FLASH
+    flash_until: float = 0.0
+
+
 @dataclass
 class FlashState:
-    last_statuses: dict[str, dict[str, str]]
-    flash_until: dict[str, tuple[str, float]]
+    # provider name -> credential key -> flash entry
+    providers: dict[str, dict[str, CredentialFlash]] = field(default_factory=dict)
 
 
-def status_for_pct(pct: float) -> str:
-    if pct <= 10:
-        return "critical"
-    if pct < 30:
-        return "warn"
-    return "ok"
+def _changed_codes(entry: CredentialFlash, names: tuple[str, ...], codes: bytes) -> list[int]:
+    if names == entry.names:
+        return [c for c, prev in zip(codes, entry.codes) if c != prev]
+    previous = dict(zip(entry.names, entry.codes))
+    return [c for name, c in zip(names, codes) if previous.get(name) != c]
 
 
 def compute_flash_statuses(
@@ -29,40 +46,50 @@ def compute_flash_statuses(
     credentials: Sequence[Credential],
     state: FlashState,
     now: Optional[float] = None,
-) -> dict[int, str]:
+) -> dict[str, str]:
+    """Return {cred_key: status} for tabs that should currently flash.
+
+    Severity codes come precomputed on each QuotaGroup; credentials whose
+    group percentages are unchanged since the last call are skipped, and
+    credentials that disappeared are evicted.
+    """
     if now is None:
         now = time.monotonic()
 
-    flash_statuses: dict[int, str] = {}
-    severity_rank = {"ok": 0, "warn": 1, "critical": 2}
+    previous = state.providers.get(provider_name, {})
+    current: dict[str, CredentialFlash] = {}
+    flash_statuses: dict[str, str] = {}
 
     for cred in credentials:
-        cred_key = f"{provider_name}:{cred.id}"
-        current_statuses = {
-            group.name: status_for_pct(float(group.remaining_pct or 0))
-            for group in cred.quota_groups
-        }
-        prev_statuses = state.last_statuses.get(cred_key)
-        changed_statuses: list[str] = []
-
-        if prev_statuses is not None:
-            changed_statuses = [
-                current_statuses[name]
-                for name in current_statuses
-                if prev_statuses.get(name) != current_statuses[name]
-            ]
-
-        if changed_statuses:
-            flash_status = max(changed_statuses, key=lambda s: severity_rank.get(s, 0))
-            state.flash_until[cred_key] = (flash_status, now + 5.0)
-
-        state.last_statuses[cred_key] = current_statuses
-
-        if cred_key in state.flash_until:
-            status, until = state.flash_until[cred_key]
-            if now <= until:
-                flash_statuses[cred.id] = status
+        pcts = tuple(float(group.remaining_pct or 0) for group in cred.quota_groups)
+        entry = previous.get(cred.key)
+
+        if entry is None or entry.pcts != pcts:
+            names = tuple(group.name for group in cred.quota_groups)
+            codes = bytes(group.severity for group in cred.quota_groups)
+            if entry is None:
+                entry = CredentialFlash(names, pcts, codes)
             else:
-                del state.flash_until[cred_key]
+                changed = _changed_codes(entry, names, codes)
+                if changed:
+                    entry.flash_code = max(changed)
+                    entry.flash_until = now + FLASH_SECONDS
+                entry.names, entry.pcts, entry.codes = names, pcts, codes
 
+        current[cred.key] = entry
+
+        if entry.flash_code != NO_FLASH:
+            if now <= entry.flash_until:
+                flash_statuses[cred.key] = STATUS_NAMES[entry.flash_code]
+            else:
+                entry.flash_code = NO_FLASH
+
+    state.providers[provider_name] = current
     return flash_statuses
+
+
+def prune_providers(state: FlashState, provider_names: Iterable[str]) -> None:
+    """Drop flash state for providers missing from the latest snapshot."""
+    keep = set(provider_names)
+    if any(p not in keep for p in state.providers):
+        state.providers = {p: e for p, e in state.providers.items() if p in keep}
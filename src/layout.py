@@ -0,0 +1,92 @@
+"""Renderer-independent layout decisions for large proxies.
+
+Keeps overlay size bounded: a worst-N summary across every credential,
+collapsible providers (collapsed providers produce a single header row and
+none of their tab or quota rows), and a capped window of credential tabs.
+"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from .config import CONFIG
+from . import data
+
+
+@dataclass
+class LayoutState:
+    # provider name (lower case) -> collapsed, for providers clicked by the user
+    overrides: dict[str, bool] = field(default_factory=dict)
+
+    def is_collapsed(self, provider_name: str, provider_count: int) -> bool:
+        name = provider_name.lower()
+        if name in self.overrides:
+            return self.overrides[name]
+        cfg = CONFIG["layout"]
+        if name in (p.lower() for p in cfg["collapsed"]):
+            return True
+        auto = cfg["auto_collapse_above"]
+        return bool(auto) and provider_count > auto
+
+    def toggle(self, provider_name: str, provider_count: int):
+        collapsed = self.is_collapsed(provider_name, provider_count)
+        self.overrides[provider_name.lower()] = not collapsed
+
+    def expand(self, provider_name: str):
+        self.overrides[provider_name.lower()] = False
+
+    def prune(self, provider_names: Iterable[str]):
+        """Forget clicks on providers missing from the latest snapshot."""
+        keep = {p.lower() for p in provider_names}
+        if any(p not in keep for p in self.overrides):
+            self.overrides = {p: c for p, c in self.overrides.items() if p in keep}
+
+
+def worst_credentials(
+    quota_data: data.QuotaData, n: int
+) -> list[tuple[data.Provider, data.Credential]]:
+    """The n most severe credentials across all providers, lowest worst_pct
+    first within a severity (thresholds can differ per provider)."""
+    if n <= 0:
+        return []
+    pairs = (
+        (provider, cred)
+        for provider in quota_data.providers
+        for cred in provider.credentials
+    )
+    return heapq.nsmallest(
+        n, pairs, key=lambda pair: (-pair[1].severity, pair[1].worst_pct)
+    )
+
+
+def provider_worst(provider: data.Provider) -> Optional[tuple[float, int]]:
+    """(pct, severity) of a provider's worst credential, for its collapsed header."""
+    if provider.credentials:
+        cred = min(provider.credentials, key=lambda c: (-c.severity, c.worst_pct))
+        return cred.worst_pct, cred.severity
+    groups = [g for g in provider.quota_groups if g.remaining_pct is not None]
+    if not groups:
+        return None
+    group = min(groups, key=lambda g: g.remaining_pct)
+    return group.remaining_pct, group.severity
+
+
+def tab_window(
+    credentials: list[data.Credential], selected_key: Optional[str]
+) -> list[data.Credential]:
+    """At most layout.max_tabs credentials, centred on the selected one.
+
+    Clicking the tab at either edge selects it and so slides the window.
+    """
+    max_tabs = CONFIG["layout"]["max_tabs"]
+    if not max_tabs or len(credentials) <= max_tabs:
+        return credentials
+    index = 0
+    for i, cred in enumerate(credentials):
+        if cred.key == selected_key:
+            index = i
+            break
+    start = min(max(0, index - max_tabs // 2), len(credentials) - max_tabs)
+    return credentials[start : start + max_tabs]
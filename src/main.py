@@ -3,60 +3,220 @@
 Mirrowel Proxy Quota Monitor - Transparent overlay for Hyprland/Wayland
 
 Config: ~/.config/quota-monitor/config.toml
-Toggle click-through: kill -USR1 $(pgrep -f quota-monitor)
-"""
+Toggle click-through: quota-monitor-toggle
+(kill -USR1 $(cat $XDG_RUNTIME_DIR/quota-monitor.pid))
 
-import gi
-gi.require_version('Gtk', '4.0')
+GTK is only imported when the overlay is started, so headless modes
+(--daemon, --export-metrics, --once/--json/--watch, --waybar) run without a display server.
+"""
 
-from gi.repository import Gtk, GLib
-import os
+import argparse
+import atexit
 import signal
-
-from .overlay import QuotaOverlay
-from .tray_manager import start_tray_process
-
-
-_window = None
-
-
-def toggle_handler(signum, frame):
-    global _window
-    if _window:
-        GLib.idle_add(_window.toggle_input)
-
-
-def visibility_handler(signum, frame):
-    global _window
-    if _window:
-        GLib.idle_add(_window.toggle_visibility)
-
-
-def quit_handler(signum, frame):
-    GLib.idle_add(Gtk.Application.get_default().quit)
-
-
-class App(Gtk.Application):
-    def __init__(self):
-        super().__init__(application_id=None)
-
-    def do_activate(self):
-        global _window
-        _window = QuotaOverlay(self)
-        _window.present()
-        start_tray_process(os.getpid())
-
-
-def main():
-    signal.signal(signal.SIGINT, quit_handler)
-    signal.signal(signal.SIGTERM, quit_handler)
-    signal.signal(signal.SIGUSR1, toggle_handler)
-    signal.signal(signal.SIGUSR2, visibility_handler)
-
-    app = App()
-    app.run(None)
+import sys
+import threading
+
+from .config import CONFIG
+from . import memory
+from .perf import PERF, install_dump_signal
+
+
+def ignore_overlay_signals():
+    """Headless modes share the `src.main` command line with the overlay, so
+    a stray `pkill -USR1 -f src.main` may reach them; don't die on it."""
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    signal.signal(signal.SIGUSR2, signal.SIG_IGN)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="quota-monitor")
+    # Run modes are exclusive; e.g. --once --waybar used to silently print
+    # the table once instead of streaming.
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--daemon",
+        action="store_true",
+        help="run headless, polling the proxy and serving snapshots on a Unix socket",
+    )
+    mode.add_argument(
+        "--export-metrics",
+        action="store_true",
+        help="run headless, serving quota state as OpenMetrics gauges on [metrics] host:port",
+    )
+    mode.add_argument(
+        "--once", action="store_true", help="print a quota table to the terminal and exit"
+    )
+    mode.add_argument(
+        "--json", action="store_true", help="print the quota snapshot as JSON and exit"
+    )
+    mode.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep a quota table on the terminal, redrawing only changed lines",
+    )
+    mode.add_argument(
+        "--waybar",
+        action="store_true",
+        help="stream one waybar/i3blocks JSON line per change on stdout",
+    )
+    parser.add_argument(
+        "--use-daemon",
+        action="store_true",
+        default=None,
+        help="read snapshots from a running --daemon instead of polling the proxy",
+    )
+    parser.add_argument(
+        "--renderer",
+        choices=["widgets", "canvas"],
+        help="overlay renderer (default: [appearance] renderer)",
+    )
+    parser.add_argument(
+        "--bench-render",
+        type=int,
+        metavar="FRAMES",
+        default=0,
+        help="render one snapshot FRAMES times, print frame-time percentiles and exit",
+    )
+    parser.add_argument(
+        "--perf",
+        action="store_true",
+        help="record timing histograms (dump with kill -RTMIN+1 <pid>)",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="write every raw /v1/quota-stats body to a new session file in DIR",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="render a --record session file (or all of DIR) in the overlay instead of polling",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        metavar="X",
+        help="replay speed multiplier; 0 = back to back (default: 1)",
+    )
+    parser.add_argument(
+        "--soak",
+        type=int,
+        default=0,
+        metavar="CYCLES",
+        help="run CYCLES accelerated refreshes on synthetic data and check memory growth",
+    )
+    parser.add_argument(
+        "--soak-headless",
+        action="store_true",
+        help="soak the parse/flash/alert/metrics pipeline without opening the overlay",
+    )
+    parser.add_argument(
+        "--soak-max-growth",
+        type=float,
+        default=8.0,
+        metavar="MB",
+        help="fail the soak test if memory grows more than MB after warmup (default: 8)",
+    )
+    parser.add_argument("--socket", help="daemon socket path (default: $XDG_RUNTIME_DIR)")
+    return parser.parse_args(argv)
+
+
+def serve_headless(server, banner: str):
+    """Run a headless server until SIGINT/SIGTERM."""
+    ignore_overlay_signals()
+    signal.signal(
+        signal.SIGTERM, lambda s, f: threading.Thread(target=server.stop).start()
+    )
+    print(banner)
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.socket:
+        CONFIG["daemon"]["socket_path"] = args.socket
+
+    # Always handled so quota-monitor-perf/-memory never kill an instance.
+    install_dump_signal()
+    memory.install_dump_signal()
+    debug = CONFIG["debug"]
+    if args.perf or debug["perf"] or debug["perf_hud"]:
+        PERF.enabled = True
+    memory.start_tracing(debug["tracemalloc_frames"])
+
+    if args.soak and args.soak_headless:
+        from .soak import run_headless
+
+        ignore_overlay_signals()
+        sys.exit(0 if run_headless(args.soak, args.soak_max_growth) else 1)
+
+    if args.record:
+        from .replay import start_recording
+
+        recorder = start_recording(args.record)
+        atexit.register(recorder.close)
+
+    if args.daemon:
+        from .daemon import QuotaDaemon, socket_path
+
+        path = socket_path()
+        try:
+            daemon = QuotaDaemon(path)
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        serve_headless(daemon, f"Serving quota snapshots on {path}")
+        return
+
+    use_daemon = args.use_daemon
+    if use_daemon is None:
+        use_daemon = CONFIG["daemon"]["use_daemon"]
+
+    if args.once or args.json or args.watch:
+        from .cli import run_cli
+
+        ignore_overlay_signals()
+        if use_daemon:
+            from .daemon import fetch_from_daemon as fetch
+        else:
+            from .data import fetch_quota_data as fetch
+        sys.exit(run_cli(fetch, as_json=args.json, watch_mode=args.watch))
+
+    if args.waybar:
+        from .waybar import run_waybar
+
+        ignore_overlay_signals()
+        run_waybar(use_daemon)
+        return
+
+    if args.export_metrics:
+        from .metrics import MetricsServer
+
+        host, port = CONFIG["metrics"]["host"], CONFIG["metrics"]["port"]
+        serve_headless(
+            MetricsServer(host, port, use_daemon),
+            f"Serving OpenMetrics on http://{host}:{port}/metrics",
+        )
+        return
+
+    from .app import run_overlay
+
+    sys.exit(
+        run_overlay(
+            use_daemon,
+            args.renderer,
+            args.bench_render,
+            args.replay,
+            args.replay_speed,
+            args.soak,
+            args.soak_max_growth,
+        )
+    )
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,96 @@
+"""Memory diagnostics: RSS, GC and tracemalloc reports.
+
+`kill -RTMIN+2 <pid>` writes a report as JSON (see dumps.py). Top
+allocators are only included when tracemalloc is running, i.e. with
+debug.tracemalloc_frames > 0 or PYTHONTRACEMALLOC set.
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import signal
+import threading
+import tracemalloc
+from typing import Optional
+
+from . import dumps
+
+
+DUMP_SIGNAL = signal.SIGRTMIN + 2
+TOP_ALLOCATORS = 15
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_bytes() -> int:
+    """Current resident set size, from /proc/self/statm."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * _PAGE_SIZE
+
+
+def peak_rss_bytes() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def start_tracing(frames: int) -> None:
+    if frames > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def top_allocators(
+    snapshot: tracemalloc.Snapshot,
+    baseline: Optional[tracemalloc.Snapshot] = None,
+    limit: int = TOP_ALLOCATORS,
+) -> list[dict]:
+    """Largest allocation sites, or largest growth since baseline."""
+    snapshot = snapshot.filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
+    if baseline is not None:
+        stats = snapshot.compare_to(baseline, "lineno")
+        return [
+            {
+                "site": str(stat.traceback[0]),
+                "size_kb": round(stat.size / 1024, 1),
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ]
+    return [
+        {
+            "site": str(stat.traceback[0]),
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def memory_report(limit: int = TOP_ALLOCATORS) -> dict:
+    report = {
+        "pid": os.getpid(),
+        "rss_kb": rss_bytes() // 1024,
+        "peak_rss_kb": peak_rss_bytes() // 1024,
+        "threads": threading.active_count(),
+        "gc_objects": len(gc.get_objects()),
+        "gc_counts": gc.get_count(),
+        "tracemalloc": tracemalloc.is_tracing(),
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        report["traced_kb"] = current // 1024
+        report["traced_peak_kb"] = peak // 1024
+        report["top_allocators"] = top_allocators(tracemalloc.take_snapshot(), limit=limit)
+    return report
+
+
+def install_dump_signal() -> None:
+    """Write memory_report() to $XDG_RUNTIME_DIR/quota-monitor-memory-<pid>.json
+    on DUMP_SIGNAL."""
+    dumps.install_dump_signal(DUMP_SIGNAL, "memory", memory_report)
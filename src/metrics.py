@@ -0,0 +1,236 @@
+"""OpenMetrics exporter for quota snapshots.
+
+Metric families are built once and their series updated in place on every
+poll, so a scrape only walks the current series and never reparses the
+proxy payload.
+"""
+
+from __future__ import annotations
+
+import http.server
+import threading
+from datetime import datetime
+from typing import Optional
+
+from .config import CONFIG
+from . import data
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# credential is the proxy's credential key, which is unique and stable;
+# identifier is the human-readable name shown in the overlay.
+GROUP_LABELS = ("provider", "credential", "identifier", "group")
+
+# Provider-wide quota groups are exported with this credential and identifier.
+ALL_CREDENTIALS = "all"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _iso_to_unix(iso_str: Optional[str]) -> Optional[float]:
+    if not iso_str:
+        return None
+    try:
+        if iso_str.endswith("Z"):
+            iso_str = iso_str[:-1] + "+00:00"
+        return datetime.fromisoformat(iso_str).timestamp()
+    except ValueError:
+        return None
+
+
+class GaugeFamily:
+    """A gauge family whose series are keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.labelnames = labelnames
+        self.header = f"# TYPE {name} gauge\n# HELP {name} {help_text}\n"
+        # label values -> [rendered series prefix, value, generation]
+        self.series: dict[tuple[str, ...], list] = {}
+
+    def set(self, labels: tuple[str, ...], value: float, generation: int):
+        entry = self.series.get(labels)
+        if entry is None:
+            if labels:
+                pairs = ",".join(
+                    f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels)
+                )
+                prefix = f"{self.name}{{{pairs}}} "
+            else:
+                prefix = f"{self.name} "
+            self.series[labels] = [prefix, value, generation]
+        else:
+            entry[1] = value
+            entry[2] = generation
+
+    def sweep(self, generation: int):
+        """Drop series that were not set during the given generation."""
+        stale = [k for k, entry in self.series.items() if entry[2] != generation]
+        for key in stale:
+            del self.series[key]
+
+    def render(self, out: list[str]):
+        out.append(self.header)
+        for prefix, value, _ in self.series.values():
+            out.append(f"{prefix}{value}\n")
+
+
+class QuotaMetrics:
+    """Prebuilt gauge families fed from QuotaData snapshots."""
+
+    def __init__(self):
+        self.up = GaugeFamily("quota_monitor_up", "Whether the last proxy poll succeeded.")
+        self.remaining = GaugeFamily(
+            "quota_remaining", "Requests remaining in the quota window.", GROUP_LABELS
+        )
+        self.max_requests = GaugeFamily(
+            "quota_max", "Request limit of the quota window.", GROUP_LABELS
+        )
+        self.remaining_pct = GaugeFamily(
+            "quota_remaining_pct", "Percentage of the quota window remaining.", GROUP_LABELS
+        )
+        self.reset_time = GaugeFamily(
+            "quota_reset_timestamp_seconds",
+            "Unix time at which the quota window resets.",
+            GROUP_LABELS,
+        )
+        self.credential_status = GaugeFamily(
+            "quota_credential_status",
+            "Credential status reported by the proxy (1 for the current status).",
+            ("provider", "credential", "identifier", "status"),
+        )
+        self.provider_cost = GaugeFamily(
+            "quota_provider_cost_dollars", "Approximate provider cost.", ("provider",)
+        )
+        self.total_cost = GaugeFamily(
+            "quota_total_cost_dollars", "Approximate total cost across providers."
+        )
+        self.total_credentials = GaugeFamily(
+            "quota_total_credentials", "Number of credentials known to the proxy."
+        )
+        self.families = [
+            self.up,
+            self.remaining,
+            self.max_requests,
+            self.remaining_pct,
+            self.reset_time,
+            self.credential_status,
+            self.provider_cost,
+            self.total_cost,
+            self.total_credentials,
+        ]
+
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._rendered: Optional[bytes] = None
+
+    def _set_group(self, labels: tuple[str, ...], group: data.QuotaGroup, gen: int):
+        self.remaining.set(labels, group.remaining, gen)
+        self.max_requests.set(labels, group.max_requests, gen)
+        if group.remaining_pct is not None:
+            self.remaining_pct.set(labels, float(group.remaining_pct), gen)
+        reset_at = _iso_to_unix(group.reset_time_iso)
+        if reset_at is not None:
+            self.reset_time.set(labels, reset_at, gen)
+
+    def update(self, quota_data: Optional[data.QuotaData]):
+        with self._lock:
+            self._generation += 1
+            gen = self._generation
+            self._rendered = None
+
+            if quota_data is None:
+                # Keep the last known values but flag the exporter as down.
+                self.up.set((), 0, gen)
+                return
+
+            self.up.set((), 1, gen)
+            self.total_cost.set((), quota_data.total_cost, gen)
+            self.total_credentials.set((), quota_data.total_credentials, gen)
+
+            for provider in quota_data.providers:
+                self.provider_cost.set((provider.name,), provider.approx_cost, gen)
+                for group in provider.quota_groups:
+                    self._set_group(
+                        (provider.name, ALL_CREDENTIALS, ALL_CREDENTIALS, group.name),
+                        group,
+                        gen,
+                    )
+                for cred in provider.credentials:
+                    self.credential_status.set(
+                        (provider.name, cred.key, cred.name, cred.status), 1, gen
+                    )
+                    for group in cred.quota_groups:
+                        self._set_group(
+                            (provider.name, cred.key, cred.name, group.name), group, gen
+                        )
+
+            for family in self.families:
+                family.sweep(gen)
+
+    def render(self) -> bytes:
+        with self._lock:
+            if self._rendered is None:
+                out: list[str] = []
+                for family in self.families:
+                    family.render(out)
+                out.append("# EOF\n")
+                self._rendered = "".join(out).encode()
+            return self._rendered
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    server: "MetricsServer"
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.metrics.render()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(http.server.ThreadingHTTPServer):
+    """Serves /metrics while a background thread keeps the gauges current."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str, port: int, use_daemon: bool = False):
+        super().__init__((host, port), _MetricsHandler)
+        self.metrics = QuotaMetrics()
+        self.use_daemon = use_daemon
+        self.stopping = threading.Event()
+
+    def poll_forever(self):
+        if self.use_daemon:
+            from .daemon import watch_daemon
+
+            watch_daemon(self.metrics.update, stop=self.stopping)
+            return
+
+        interval = CONFIG["server"]["refresh_interval_ms"] / 1000
+        while not self.stopping.is_set():
+            self.metrics.update(data.fetch_quota_data())
+            self.stopping.wait(interval)
+
+    def serve(self):
+        threading.Thread(target=self.poll_forever, daemon=True).start()
+        try:
+            self.serve_forever()
+        finally:
+            self.stopping.set()
+            self.server_close()
+
+    def stop(self):
+        self.stopping.set()
+        self.shutdown()
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import json
+import sys
 import time
 import threading
 from typing import Optional
@@ -15,18 +17,44 @@ from gi.repository import Gtk, GLib, Gtk4LayerShell as LayerShell
 
 from .config import CONFIG
 from . import ui
+from . import canvas
 from . import flash
 from . import data
+from . import daemon
+from . import alerts
+from . import replay
+from . import layout
+from .perf import PERF
+
+
+# Marker for "whole surface accepts input" (click-through disabled).
+INPUT_ALL = "all"
 
 
 class QuotaOverlay(Gtk.Window):
-    def __init__(self, app):
+    def __init__(
+        self,
+        app,
+        use_daemon: bool = False,
+        renderer: Optional[str] = None,
+        poll: bool = True,
+    ):
         super().__init__(application=app)
+        self.renderer = renderer or CONFIG["appearance"]["renderer"]
 
         self.click_through = CONFIG["behavior"]["click_through"]
-        self.selected_creds = {}  # provider_name -> cred_id
+        self.selected_creds = {}  # provider_name -> credential key
         self.interactive_widgets = []
-        self._flash_state = flash.FlashState(last_statuses={}, flash_until={})
+        self._input_dirty = True
+        # What the widgets renderer last laid out, as far as it can move the
+        # interactive widgets (see _update_widgets).
+        self._widget_layout = None
+        # Last region sent to the surface: None (unknown), INPUT_ALL, or rects
+        self._applied_input = None
+        self._flash_state = flash.FlashState()
+        self._layout = layout.LayoutState()
+        # A shared daemon sends the alerts itself.
+        self._alerts = None if use_daemon else alerts.notifier_from_config()
 
         LayerShell.init_for_window(self)
         LayerShell.set_layer(self, LayerShell.Layer.OVERLAY)
@@ -44,14 +72,36 @@ class QuotaOverlay(Gtk.Window):
         self.main_box.add_css_class("overlay-main")
         self.set_child(self.main_box)
 
-        self.content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
-        self.content_box.add_css_class("overlay-content")
-        self.main_box.append(self.content_box)
+        self.canvas = None
+        if self.renderer == "canvas":
+            self.canvas = canvas.QuotaCanvas(
+                self.on_cred_switch, self.on_provider_toggle, self.on_summary_click
+            )
+            self.main_box.append(self.canvas)
+        else:
+            self.content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+            self.content_box.add_css_class("overlay-content")
+            self.main_box.append(self.content_box)
+
+        self.perf_label = None
+        if CONFIG["debug"]["perf_hud"]:
+            self.perf_label = Gtk.Label(label="perf: no samples")
+            self.perf_label.set_halign(Gtk.Align.START)
+            self.perf_label.add_css_class("overlay-status")
+            self.main_box.append(self.perf_label)
+
+        # Direct polling is driven by map/unmap so a hidden overlay can slow
+        # down or stop; a daemon keeps pushing and only rendering is skipped.
+        self._polling = poll and not use_daemon
+        self._poll_source = 0
+        self._render_pending = False  # a snapshot arrived while unmapped
 
         self.connect("realize", self.on_realize)
+        self.connect("map", self._on_map)
+        self.connect("unmap", self._on_unmap)
 
-        self.refresh_data()
-        GLib.timeout_add(CONFIG["server"]["refresh_interval_ms"], self.refresh_data)
+        if poll and use_daemon:
+            self.follow_daemon()
 
     def _setup_position(self):
         pos = CONFIG["position"]
@@ -79,42 +129,78 @@ class QuotaOverlay(Gtk.Window):
             LayerShell.set_margin(self, LayerShell.Edge.RIGHT, pos["margin_right"])
 
     def on_realize(self, widget):
+        # Input rectangles are recomputed after the frame that follows a
+        # layout change, once allocations are final.
+        self.get_frame_clock().connect("after-paint", self._on_after_paint)
         if self.click_through:
             self.set_input_passthrough(True)
 
+    def _on_after_paint(self, frame_clock):
+        if self._input_dirty:
+            self.update_input_region()
+
+    def invalidate_input_region(self):
+        """Mark tab geometry as changed; applied after the next paint."""
+        self._input_dirty = True
+
     def set_input_passthrough(self, passthrough: bool):
         self.click_through = passthrough
         self.update_input_region()
 
+    def _interactive_rects(self) -> tuple[tuple[int, int, int, int], ...]:
+        rects = []
+        for widget in self.interactive_widgets:
+            success, rect = widget.compute_bounds(self)
+            if success:
+                rects.append(
+                    (
+                        int(rect.origin.x),
+                        int(rect.origin.y),
+                        int(rect.size.width),
+                        int(rect.size.height),
+                    )
+                )
+
+        if self.canvas is not None:
+            success, bounds = self.canvas.compute_bounds(self)
+            if success:
+                for x, y, w, h in self.canvas.hit_rects():
+                    rects.append(
+                        (
+                            int(bounds.origin.x + x),
+                            int(bounds.origin.y + y),
+                            int(w),
+                            int(h),
+                        )
+                    )
+        return tuple(rects)
+
     def update_input_region(self):
+        with PERF.span("ui.input_region"):
+            self._update_input_region()
+
+    def _update_input_region(self):
         native = self.get_native()
         if not native:
             return
         surface = native.get_surface()
         if not surface:
             return
+        self._input_dirty = False
 
         if not self.click_through:
-            surface.set_input_region(None)
+            if self._applied_input != INPUT_ALL:
+                surface.set_input_region(None)
+                self._applied_input = INPUT_ALL
             return
 
-        region = cairo.Region()
-
-        for widget in self.interactive_widgets:
-            success, rect = widget.compute_bounds(self)
-            if success:
-                region.union(
-                    cairo.Region(
-                        cairo.RectangleInt(
-                            int(rect.origin.x),
-                            int(rect.origin.y),
-                            int(rect.size.width),
-                            int(rect.size.height),
-                        )
-                    )
-                )
+        rects = self._interactive_rects()
+        if rects == self._applied_input:
+            return
 
+        region = cairo.Region([cairo.RectangleInt(*rect) for rect in rects])
         surface.set_input_region(region)
+        self._applied_input = rects
 
     def toggle_input(self):
         self.set_input_passthrough(not self.click_through)
@@ -125,25 +211,196 @@ class QuotaOverlay(Gtk.Window):
         else:
             self.show()
             self.present()
-            GLib.idle_add(self.update_input_region)
+            # The surface may have been recreated; push the region again.
+            self._applied_input = None
+            self.invalidate_input_region()
+
+    def _schedule_poll(self, interval_ms: int):
+        """Replace the poll timer; an interval of 0 stops polling."""
+        if self._poll_source:
+            GLib.source_remove(self._poll_source)
+            self._poll_source = 0
+        if interval_ms > 0:
+            self._poll_source = GLib.timeout_add(interval_ms, self.refresh_data)
+
+    def _hidden_interval_ms(self) -> int:
+        behavior = CONFIG["behavior"]
+        mode = behavior["hidden_polling"]
+        if mode == "full":
+            return CONFIG["server"]["refresh_interval_ms"]
+        if mode == "alerts" and self._alerts is not None:
+            return behavior["hidden_refresh_interval_ms"]
+        return 0
+
+    def _on_map(self, widget):
+        # Catch up at once: show what arrived while hidden, then fetch.
+        if self._render_pending and hasattr(self, "_last_data"):
+            self._show_snapshot(self._last_data)
+        if self._polling:
+            self.refresh_data()
+            self._schedule_poll(CONFIG["server"]["refresh_interval_ms"])
+
+    def _on_unmap(self, widget):
+        if self._polling:
+            self._schedule_poll(self._hidden_interval_ms())
+
+    def _show_snapshot(self, data_response: Optional[data.QuotaData]) -> bool:
+        """Render a snapshot, or defer it to the next map while hidden."""
+        if self.get_mapped():
+            self._render_pending = False
+            self.update_ui(data_response)
+        else:
+            self._render_pending = True
+        return False
 
-    def on_cred_switch(self, provider_name, cred_id):
-        self.selected_creds[provider_name] = cred_id
+    def on_cred_switch(self, provider_name, cred_key):
+        self.selected_creds[provider_name] = cred_key
         if hasattr(self, "_last_data"):
             self.update_ui(self._last_data)
 
+    def on_provider_toggle(self, provider_name):
+        if hasattr(self, "_last_data") and self._last_data:
+            self._layout.toggle(provider_name, len(self._last_data.providers))
+            self.update_ui(self._last_data)
+
+    def on_summary_click(self, provider_name, cred_key):
+        """Jump to a summary row's credential, expanding its provider."""
+        self._layout.expand(provider_name)
+        self.on_cred_switch(provider_name, cred_key)
+
     def refresh_data(self) -> bool:
         def fetch():
             data_response = data.fetch_quota_data()
             self._last_data = data_response
-            GLib.idle_add(self.update_ui, data_response)
+            if self._alerts:
+                self._alerts.process(data_response)
+            GLib.idle_add(self._show_snapshot, data_response)
 
         threading.Thread(target=fetch, daemon=True).start()
         return True
 
+    def follow_daemon(self):
+        """Render every snapshot pushed by a shared quota daemon."""
+
+        def on_snapshot(data_response):
+            self._last_data = data_response
+            GLib.idle_add(self._show_snapshot, data_response)
+
+        threading.Thread(
+            target=daemon.watch_daemon, args=(on_snapshot,), daemon=True
+        ).start()
+
+    def follow_replay(self, path: str, speed: float = 1.0):
+        """Render a recording instead of polling, then quit.
+
+        Each snapshot is rendered before the next one is parsed, so speed 0
+        replays as fast as update_ui allows.
+        """
+
+        def on_snapshot(data_response):
+            rendered = threading.Event()
+
+            def apply():
+                self._last_data = data_response
+                self.update_ui(data_response)
+                rendered.set()
+
+            GLib.idle_add(apply)
+            rendered.wait()
+
+        def run():
+            try:
+                count = replay.replay(path, on_snapshot, speed)
+                print(f"Replayed {count} snapshots from {path}", file=sys.stderr)
+            except Exception as e:
+                print(f"Error: {e}", file=sys.stderr)
+            GLib.idle_add(self._finish_replay)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _finish_replay(self):
+        if PERF.enabled:
+            print(json.dumps(PERF.to_dict(), indent=2))
+        self.get_application().quit()
+
+    def _provider_view(self, provider: data.Provider, now: float):
+        """Selected credential key, tab flash statuses and groups to display."""
+        with PERF.span("flash.compute"):
+            flash_statuses = flash.compute_flash_statuses(
+                provider.name,
+                provider.credentials,
+                self._flash_state,
+                now,
+            )
+
+        # Follow the selected credential by key; default to the first one.
+        active = provider.credentials_by_key.get(self.selected_creds.get(provider.name))
+        if active is None and provider.credentials:
+            active = provider.credentials[0]
+
+        if active is not None:
+            return active.key, flash_statuses, active.quota_groups
+
+        display_groups = sorted(
+            provider.quota_groups, key=data.sort_quota_groups(provider.name)
+        )
+        return None, flash_statuses, display_groups
+
+    def _worst_credentials(self, data_response: data.QuotaData):
+        return layout.worst_credentials(data_response, CONFIG["layout"]["summary_rows"])
+
     def update_ui(self, data_response: Optional[data.QuotaData]):
-        while child := self.content_box.get_first_child():
-            self.content_box.remove(child)
+        with PERF.span("ui.update"):
+            if self.canvas is not None:
+                self._update_canvas(data_response)
+            else:
+                self._update_widgets(data_response)
+
+            if data_response:
+                names = [p.name for p in data_response.providers]
+                flash.prune_providers(self._flash_state, names)
+                self._layout.prune(names)
+
+        if self.perf_label is not None:
+            self.perf_label.set_text(PERF.hud_text())
+
+    def _update_canvas(self, data_response: Optional[data.QuotaData]):
+        now = time.monotonic()
+        if not data_response:
+            self.canvas.set_offline(now)
+        else:
+            colors = CONFIG["colors"]
+            provider_count = len(data_response.providers)
+            with PERF.span("ui.markup"):
+                rows = canvas.summary_rows(self._worst_credentials(data_response), colors)
+            for provider in data_response.providers:
+                sel_key, flash_statuses, display_groups = self._provider_view(provider, now)
+                collapsed = self._layout.is_collapsed(provider.name, provider_count)
+                with PERF.span("ui.markup"):
+                    rows.extend(
+                        canvas.provider_rows(
+                            provider.name,
+                            provider.credential_count,
+                            layout.tab_window(provider.credentials, sel_key),
+                            sel_key,
+                            flash_statuses,
+                            display_groups,
+                            data.format_countdown,
+                            colors,
+                            collapsed,
+                            layout.provider_worst(provider) if collapsed else None,
+                        )
+                    )
+            with PERF.span("ui.canvas_rows"):
+                self.canvas.set_rows(rows, now)
+
+        if self.canvas.hits_moved:
+            self.invalidate_input_region()
+
+    def _update_widgets(self, data_response: Optional[data.QuotaData]):
+        with PERF.span("ui.teardown"):
+            while child := self.content_box.get_first_child():
+                self.content_box.remove(child)
 
         self.interactive_widgets = []
 
@@ -151,51 +408,87 @@ class QuotaOverlay(Gtk.Window):
             lbl = Gtk.Label(label="offline")
             lbl.add_css_class("quota-critical")
             self.content_box.append(lbl)
+            self._set_widget_layout(None)
             return
 
         colors = CONFIG["colors"]
+        now = time.monotonic()
+        provider_count = len(data_response.providers)
+        # Everything that sizes or places an interactive widget: their own
+        # text and state, and the width of every row (monospace, so length;
+        # percentages are padded and do not change it).
+        widget_layout = []
+
+        with PERF.span("ui.build"):
+            for provider, cred in self._worst_credentials(data_response):
+                markup = ui.summary_row_markup(provider.name, cred, colors)
+                widget_layout.append(len(markup))
+                row = ui.make_summary_row(
+                    markup,
+                    lambda p=provider.name, k=cred.key: self.on_summary_click(p, k),
+                )
+                self.content_box.append(row)
+                self.interactive_widgets.append(row)
 
         for provider in data_response.providers:
-            sel_id = self.selected_creds.get(provider.name, 1)
-            flash_statuses = flash.compute_flash_statuses(
-                provider.name,
-                provider.credentials,
-                self._flash_state,
-                time.monotonic(),
-            )
-
-            header, interactive = ui.make_provider_header(
+            sel_key, flash_statuses, display_groups = self._provider_view(provider, now)
+            collapsed = self._layout.is_collapsed(provider.name, provider_count)
+            tabs = layout.tab_window(provider.credentials, sel_key)
+            header_markup = ui.provider_header_markup(
                 provider.name,
                 provider.credential_count,
-                provider.credentials,
-                sel_id,
-                self.on_cred_switch,
-                flash_statuses,
+                collapsed,
+                layout.provider_worst(provider) if collapsed else None,
+                colors,
             )
-            self.content_box.append(header)
-            self.interactive_widgets.extend(interactive)
-
-            active_creds = [c for c in provider.credentials if c.id == sel_id]
-            if active_creds:
-                display_groups = active_creds[0].quota_groups
-            else:
-                display_groups = provider.quota_groups
-
-            if not active_creds:
-                display_groups = sorted(
-                    display_groups, key=data.sort_quota_groups(provider.name)
+            widget_layout.append(
+                (
+                    header_markup,
+                    sel_key,
+                    tuple((c.id, c.tier, flash_statuses.get(c.key)) for c in tabs),
                 )
+            )
 
-            for quota_group in display_groups:
-                countdown = data.format_countdown(quota_group.reset_time_iso)
-                row = ui.make_quota_row(
-                    quota_group.name,
-                    quota_group.remaining,
-                    quota_group.max_requests,
-                    quota_group.remaining_pct or 0,
-                    countdown,
-                    colors,
+            with PERF.span("ui.build"):
+                header, interactive = ui.make_provider_header(
+                    provider.name,
+                    header_markup,
+                    tabs,
+                    sel_key,
+                    self.on_cred_switch,
+                    flash_statuses,
+                    collapsed,
+                    self.on_provider_toggle,
                 )
-                self.content_box.append(row)
+                self.content_box.append(header)
+                self.interactive_widgets.extend(interactive)
+
+                # Rows of collapsed providers are never created.
+                if collapsed:
+                    continue
+
+                for quota_group in display_groups:
+                    countdown = data.format_countdown(quota_group.reset_time_iso)
+                    markup = ui.quota_line_markup(
+                        quota_group.name,
+                        quota_group.remaining,
+                        quota_group.max_requests,
+                        quota_group.remaining_pct or 0,
+                        quota_group.severity,
+                        colors,
+                    )
+                    widget_layout.append((len(markup), len(countdown)))
+                    row = ui.make_quota_row(markup, countdown)
+                    self.content_box.append(row)
+
+        self._set_widget_layout(tuple(widget_layout))
+
+    def _set_widget_layout(self, widget_layout):
+        """Recompute the input region only when the widget layout changed.
 
-        GLib.idle_add(self.update_input_region)
+        Rebuilding identical widgets leaves them where they were, so most
+        refreshes (new percentages, ticking countdowns) skip compute_bounds.
+        """
+        if widget_layout != self._widget_layout:
+            self._widget_layout = widget_layout
+            self.invalidate_input_region()
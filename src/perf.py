@@ -0,0 +1,148 @@
+"""Lightweight timing instrumentation.
+
+Spans record into fixed-size rolling histograms keyed by name. While
+instrumentation is disabled, PERF.span() returns a shared no-op context
+manager, so instrumented code pays one attribute check per span.
+
+    with PERF.span("fetch.decode"):
+        payload = json.loads(body)
+
+`kill -RTMIN+1 <pid>` dumps every histogram as JSON (see dumps.py).
+"""
+
+from __future__ import annotations
+
+import signal
+import threading
+import time
+from array import array
+
+from . import dumps
+
+
+HISTOGRAM_SIZE = 256
+DUMP_SIGNAL = signal.SIGRTMIN + 1
+
+# Spans shown in the overlay's debug row, as (label, span name).
+HUD_SPANS = (
+    ("fetch", "fetch.total"),
+    ("ui", "ui.update"),
+    ("input", "ui.input_region"),
+    ("flash", "flash.compute"),
+)
+
+
+class RollingHistogram:
+    """The last HISTOGRAM_SIZE samples, in a preallocated ring buffer."""
+
+    def __init__(self, size: int = HISTOGRAM_SIZE):
+        self._samples = array("d", bytes(8 * size))
+        self._size = size
+        self._next = 0
+        self._filled = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self._samples[self._next] = value
+        self._next = (self._next + 1) % self._size
+        if self._filled < self._size:
+            self._filled += 1
+        self.count += 1
+
+    def percentile(self, pct: float) -> float:
+        if not self._filled:
+            return 0.0
+        ordered = sorted(self._samples[: self._filled])
+        return ordered[min(self._filled - 1, int(pct / 100 * self._filled))]
+
+    def summary(self) -> dict:
+        """Percentiles over the rolling window, in milliseconds."""
+        if not self._filled:
+            return {"count": 0}
+        ordered = sorted(self._samples[: self._filled])
+        n = self._filled
+
+        def at(pct: float) -> float:
+            return round(ordered[min(n - 1, int(pct / 100 * n))] * 1000, 3)
+
+        return {
+            "count": self.count,
+            "window": n,
+            "p50_ms": at(50),
+            "p95_ms": at(95),
+            "p99_ms": at(99),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+
+
+class _Span:
+    __slots__ = ("perf", "name", "start")
+
+    def __init__(self, perf: "Perf", name: str):
+        self.perf = perf
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.perf.record(self.name, time.perf_counter() - self.start)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Perf:
+    def __init__(self):
+        self.enabled = False
+        self.histograms: dict[str, RollingHistogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = RollingHistogram()
+            histogram.add(seconds)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {name: h.summary() for name, h in sorted(self.histograms.items())}
+
+    def hud_text(self) -> str:
+        """One-line p50/p95 summary for the overlay debug row."""
+        parts = []
+        with self._lock:
+            for label, name in HUD_SPANS:
+                histogram = self.histograms.get(name)
+                if histogram and histogram.count:
+                    p50 = histogram.percentile(50) * 1000
+                    p95 = histogram.percentile(95) * 1000
+                    parts.append(f"{label} {p50:.1f}/{p95:.1f}")
+        return "  ".join(parts) + " ms" if parts else "perf: no samples"
+
+
+PERF = Perf()
+
+
+def install_dump_signal() -> None:
+    """Dump histograms to $XDG_RUNTIME_DIR/quota-monitor-perf-<pid>.json on DUMP_SIGNAL."""
+    dumps.install_dump_signal(DUMP_SIGNAL, "perf", PERF.to_dict)
@@ -0,0 +1,92 @@
+"""Frame-time benchmark for the overlay renderers.
+
+Re-renders one snapshot repeatedly, changing a single quota row per frame,
+and measures update_ui time plus the frame that follows it, from
+before-paint to after-paint (vsync waits are excluded). Timing from
+before-paint rather than layout matters: the canvas renderer usually keeps
+its size and only queues a draw, so its frames may skip the layout phase.
+Run once per renderer and compare:
+
+    quota-monitor --bench-render 300 --renderer widgets
+    quota-monitor --bench-render 300 --renderer canvas
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from gi.repository import GLib
+
+from . import data
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class RenderBenchmark:
+    def __init__(self, window, frames: int, quota_data: Optional[data.QuotaData]):
+        self.window = window
+        self.frames = frames
+        self.quota_data = quota_data
+        self.samples: list[float] = []
+        self._update_time = 0.0
+        self._frame_start: Optional[float] = None
+        self._pending = False
+        self._group = self._first_group(quota_data)
+        self._base_remaining = self._group.remaining if self._group else 0
+
+    @staticmethod
+    def _first_group(quota_data: Optional[data.QuotaData]) -> Optional[data.QuotaGroup]:
+        if quota_data is None:
+            return None
+        for provider in quota_data.providers:
+            for cred in provider.credentials:
+                if cred.quota_groups:
+                    return cred.quota_groups[0]
+            if provider.quota_groups:
+                return provider.quota_groups[0]
+        return None
+
+    def start(self):
+        clock = self.window.get_frame_clock()
+        clock.connect("before-paint", self._on_before_paint)
+        clock.connect("after-paint", self._on_after_paint)
+        GLib.idle_add(self._step)
+
+    def _step(self) -> bool:
+        if self._group is not None:
+            self._group.remaining = self._base_remaining + len(self.samples) % 2
+        started = time.perf_counter()
+        self.window.update_ui(self.quota_data)
+        self._update_time = time.perf_counter() - started
+        self._frame_start = None
+        self._pending = True
+        self.window.queue_draw()
+        return False
+
+    def _on_before_paint(self, clock):
+        if self._pending and self._frame_start is None:
+            self._frame_start = time.perf_counter()
+
+    def _on_after_paint(self, clock):
+        if not self._pending or self._frame_start is None:
+            return
+        self._pending = False
+        self.samples.append(self._update_time + time.perf_counter() - self._frame_start)
+        if len(self.samples) < self.frames:
+            GLib.idle_add(self._step)
+        else:
+            self.report()
+            self.window.get_application().quit()
+
+    def report(self):
+        ms = [s * 1000 for s in self.samples]
+        print(
+            f"renderer={self.window.renderer} frames={len(ms)} "
+            f"p50={percentile(ms, 50):.2f}ms p95={percentile(ms, 95):.2f}ms "
+            f"max={max(ms):.2f}ms"
+        )
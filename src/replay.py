@@ -0,0 +1,117 @@
+"""Record raw /v1/quota-stats bodies and replay them without a network.
+
+Recordings are gzip-compressed JSON lines, one {"ts", "body_b64"} object
+per poll. Each session writes its own DIR/quota-stats-<start ms>-<pid>.jsonl.gz
+and a DIR replays all of its sessions in order. Bodies are stored base64
+encoded so they replay byte for byte, whatever their encoding. Each record
+is sync-flushed, so a session cut short by a crash or SIGKILL (e.g. a
+waybar reload, which never runs atexit) replays up to its last complete
+record, and the sessions after it are unaffected.
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from . import data
+
+
+RECORD_GLOB = "quota-stats-*.jsonl.gz"
+
+
+def recording_paths(path: str) -> list[Path]:
+    """A single recording file, or every session in a directory, oldest first."""
+    p = Path(path).expanduser()
+    if not p.is_dir():
+        return [p]
+    # Start times are fixed-width milliseconds, so names sort chronologically.
+    return sorted(p.glob(RECORD_GLOB))
+
+
+class Recorder:
+    def __init__(self, directory: str):
+        directory_path = Path(directory).expanduser()
+        directory_path.mkdir(parents=True, exist_ok=True)
+        # A new file per session: appending after a session that was killed
+        # mid-stream would leave the new gzip member unreadable.
+        name = f"quota-stats-{int(time.time() * 1000)}-{os.getpid()}.jsonl.gz"
+        self.path = directory_path / name
+        self._file = gzip.open(self.path, "xb")
+        self._lock = threading.Lock()
+
+    def write(self, body: bytes):
+        record = {"ts": time.time(), "body_b64": base64.b64encode(body).decode("ascii")}
+        line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            self._file.flush(zlib.Z_SYNC_FLUSH)
+
+    def close(self):
+        if self.write in data.BODY_HOOKS:
+            data.BODY_HOOKS.remove(self.write)
+        with self._lock:
+            self._file.close()
+
+
+def start_recording(directory: str) -> Recorder:
+    """Append every body fetched from the proxy to a recording in directory."""
+    recorder = Recorder(directory)
+    data.BODY_HOOKS.append(recorder.write)
+    return recorder
+
+
+def iter_records(path: str) -> Iterator[tuple[float, bytes]]:
+    """Yield (timestamp, raw body) pairs; a truncated or corrupt tail ends
+    only the session file it is in."""
+    for session in recording_paths(path):
+        with gzip.open(session, "rb") as f:
+            try:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    yield record["ts"], base64.b64decode(record["body_b64"])
+            except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError):
+                continue
+
+
+def replay(
+    path: str,
+    on_snapshot: Callable[[data.QuotaData], None],
+    speed: float = 1.0,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """Feed recorded bodies through the parser to on_snapshot.
+
+    speed scales the recorded gaps between polls (2.0 = twice as fast);
+    0 replays back to back. Returns the number of snapshots replayed.
+    """
+    stop = stop or threading.Event()
+    previous_ts = None
+    count = 0
+    for ts, body in iter_records(path):
+        if previous_ts is not None and speed > 0:
+            if stop.wait(max(0.0, ts - previous_ts) / speed):
+                break
+        if stop.is_set():
+            break
+        previous_ts = ts
+        on_snapshot(data.decode_quota_data(body))
+        count += 1
+    return count
+
+
+def first_snapshot(path: str) -> Optional[data.QuotaData]:
+    for _, body in iter_records(path):
+        return data.decode_quota_data(body)
+    return None
@@ -0,0 +1,45 @@
+"""Quota severity classification.
+
+Every group is classified once while a snapshot is parsed (see
+data.parse_quota_data); flash tracking, the overlay, the CLI and waybar all
+read the stored code instead of comparing percentages themselves.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .config import CONFIG
+
+
+# Severity codes, ordered by severity.
+OK, WARN, CRITICAL = 0, 1, 2
+NAMES = ("ok", "warn", "critical")
+# Key in CONFIG["colors"] for each code.
+COLOR_KEYS = ("ok", "warning", "critical")
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    critical: float = 10.0  # remaining % at or below which a group is critical
+    warn: float = 30.0  # remaining % below which a group is a warning
+
+    def classify(self, pct: float) -> int:
+        if pct <= self.critical:
+            return CRITICAL
+        if pct < self.warn:
+            return WARN
+        return OK
+
+
+def thresholds_for(provider_name: str) -> Thresholds:
+    """Global thresholds, overridden by [severity.providers.<name>]."""
+    cfg = CONFIG["severity"]
+    name = provider_name.lower()
+    override = next(
+        (v for k, v in cfg["providers"].items() if k.lower() == name), {}
+    )
+    return Thresholds(
+        critical=float(override.get("critical", cfg["critical"])),
+        warn=float(override.get("warn", cfg["warn"])),
+    )
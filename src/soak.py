@@ -0,0 +1,214 @@
+"""Accelerated memory soak test.
+
+Drives thousands of refresh cycles back to back against a synthetic
+/v1/quota-stats body and fails if memory keeps growing once caches have
+warmed up. Each cycle changes percentages, reorders credentials and
+periodically rotates credential keys and drops a provider, so every
+eviction path (flash state, alert state, metric series, canvas caches)
+is exercised:
+
+    quota-monitor --soak 5000 --soak-headless
+    quota-monitor --soak 5000 --renderer canvas
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+from . import alerts
+from . import data
+from . import flash
+from . import memory
+from .config import CONFIG
+
+
+PROVIDERS = ("gemini_cli", "antigravity", "openai", "anthropic", "qwen_code", "iflow")
+CREDENTIALS_PER_PROVIDER = 8
+GROUPS = ("pro", "flash", "lite", "image")
+# Cycles between credential key rotations / provider drop-outs.
+ROTATE_EVERY = 50
+DROP_EVERY = 120
+SAMPLE_EVERY = 100
+
+
+def synthetic_body(cycle: int, rng: random.Random) -> bytes:
+    """A /v1/quota-stats body whose contents change every cycle."""
+    generation = cycle // ROTATE_EVERY
+    dropped = PROVIDERS[(cycle // DROP_EVERY) % len(PROVIDERS)]
+    providers = {}
+    total = 0
+
+    for p_index, pname in enumerate(PROVIDERS):
+        if pname == dropped and cycle % DROP_EVERY < DROP_EVERY // 2:
+            continue
+        creds = []
+        for c_index in range(CREDENTIALS_PER_PROVIDER):
+            # One credential per provider gets a fresh key each generation.
+            key = f"{pname}-{c_index}" if c_index else f"{pname}-g{generation}"
+            usage = {}
+            for g_index, gname in enumerate(GROUPS):
+                remaining = (cycle + 7 * c_index + 13 * g_index + p_index) % 101
+                usage[gname] = {
+                    "windows": {
+                        "daily": {
+                            "remaining": remaining,
+                            "limit": 100,
+                            "reset_at": 1_900_000_000 + cycle,
+                        }
+                    }
+                }
+            creds.append(
+                (
+                    key,
+                    {
+                        "identifier": f"{key}@example.com",
+                        "tier": "standard",
+                        "status": "active" if rng.random() > 0.1 else "cooldown",
+                        "group_usage": usage,
+                    },
+                )
+            )
+        rng.shuffle(creds)
+        total += len(creds)
+        providers[pname] = {
+            "credential_count": len(creds),
+            "approx_cost": round(cycle * 0.001, 3),
+            "quota_groups": {
+                gname: {
+                    "windows": {
+                        "daily": {
+                            "total_remaining": (cycle + g_index) % 800,
+                            "total_max": 800,
+                        }
+                    }
+                }
+                for g_index, gname in enumerate(GROUPS)
+            },
+            "credentials": dict(creds),
+        }
+
+    payload = {
+        "providers": providers,
+        "summary": {"total_credentials": total, "approx_total_cost": cycle * 0.006},
+    }
+    return json.dumps(payload).encode()
+
+
+class HeadlessPipeline:
+    """Everything a refresh does outside GTK: parse, flash, alerts, metrics, CLI."""
+
+    def __init__(self):
+        from .cli import render_table
+        from .metrics import QuotaMetrics
+
+        self._render_table = render_table
+        self.flash_state = flash.FlashState()
+        self.engine = alerts.AlertEngine(
+            [alerts.AlertRule(**rule) for rule in CONFIG["alerts"]["rules"]],
+            float(CONFIG["alerts"]["hysteresis"]),
+        )
+        self.metrics = QuotaMetrics()
+        self.cycle = 0
+
+    def __call__(self, quota_data: data.QuotaData):
+        # Simulated 5 s refresh clock, so flash windows open and expire.
+        self.cycle += 1
+        now = self.cycle * 5.0
+        for provider in quota_data.providers:
+            flash.compute_flash_statuses(
+                provider.name, provider.credentials, self.flash_state, now
+            )
+        flash.prune_providers(self.flash_state, (p.name for p in quota_data.providers))
+        self.engine.evaluate(quota_data)
+        self.metrics.update(quota_data)
+        self.metrics.render()
+        self._render_table(quota_data)
+
+
+class SoakTest:
+    def __init__(
+        self,
+        cycles: int,
+        render: Callable[[data.QuotaData], None],
+        max_growth_mb: float = 8.0,
+        seed: int = 0,
+    ):
+        self.cycles = cycles
+        self.render = render
+        self.max_growth = int(max_growth_mb * 1024 * 1024)
+        self.warmup = max(50, cycles // 10)
+        self.cycle = 0
+        self.samples: list[tuple[int, int]] = []  # (cycle, rss bytes)
+        self._rng = random.Random(seed)
+        self._baseline_rss = 0
+        self._baseline_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started = 0.0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+        self._started = time.monotonic()
+
+    def run_cycle(self) -> bool:
+        """Run one refresh cycle; returns False once all cycles are done."""
+        self.render(data.decode_quota_data(synthetic_body(self.cycle, self._rng)))
+        self.cycle += 1
+
+        if self.cycle == self.warmup:
+            gc.collect()
+            self._baseline_rss = memory.rss_bytes()
+            self._baseline_snapshot = tracemalloc.take_snapshot()
+        if self.cycle % SAMPLE_EVERY == 0:
+            self.samples.append((self.cycle, memory.rss_bytes()))
+        return self.cycle < self.cycles
+
+    def run(self) -> bool:
+        self.start()
+        while self.run_cycle():
+            pass
+        return self.report()
+
+    def report(self) -> bool:
+        """Print RSS samples and top growing allocators; True if within bounds."""
+        gc.collect()
+        elapsed = time.monotonic() - self._started
+        final_rss = memory.rss_bytes()
+        snapshot = tracemalloc.take_snapshot()
+
+        if self._baseline_snapshot is None:
+            print(f"Error: soak needs more than {self.warmup} cycles", file=sys.stderr)
+            return False
+
+        rss_growth = final_rss - self._baseline_rss
+        traced_growth = sum(
+            stat.size_diff
+            for stat in snapshot.compare_to(self._baseline_snapshot, "filename")
+        )
+
+        print(
+            f"cycles={self.cycle} warmup={self.warmup} "
+            f"elapsed={elapsed:.1f}s ({self.cycle / elapsed:.0f}/s)"
+        )
+        print("rss_mb " + " ".join(f"{c}:{rss / 2**20:.1f}" for c, rss in self.samples))
+        print(
+            f"rss growth after warmup: {rss_growth / 1024:+.0f} KiB, "
+            f"traced growth: {traced_growth / 1024:+.0f} KiB "
+            f"(limit {self.max_growth / 1024:.0f} KiB)"
+        )
+        print("top allocators by growth:")
+        for stat in memory.top_allocators(snapshot, self._baseline_snapshot, limit=10):
+            print(f"  {stat['size_diff_kb']:+9.1f} KiB {stat['count_diff']:+7d}  {stat['site']}")
+
+        ok = rss_growth <= self.max_growth and traced_growth <= self.max_growth
+        print("PASS" if ok else "FAIL: memory grew beyond the limit")
+        return ok
+
+
+def run_headless(cycles: int, max_growth_mb: float) -> bool:
+    return SoakTest(cycles, HeadlessPipeline(), max_growth_mb).run()
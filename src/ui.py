@@ -2,8 +2,9 @@
 Mirrowel Proxy Quota Monitor - UI Components
 """
 
-from gi.repository import Gtk, Gdk
+from gi.repository import Gtk, Gdk, GLib
 from .config import CONFIG
+from . import severity
 
 
 def get_css() -> bytes:
@@ -147,38 +148,94 @@ def load_css():
     )
 
 
-def make_provider_header(
+def provider_header_markup(
     name: str,
     cred_count: int,
+    collapsed: bool = False,
+    worst: tuple[float, int] | None = None,
+    colors: dict | None = None,
+) -> str:
+    arrow = "▸" if collapsed else "▾"
+    markup = (
+        f"{arrow} <b>{name.upper()}</b> "
+        f"<span size='small' color='#555'>({cred_count})</span>"
+    )
+    # A collapsed provider still shows how close its worst credential is.
+    if collapsed and worst is not None and colors:
+        pct, code = worst
+        markup += f" <span color='{severity_color(code, colors)}'>{int(pct)}%</span>"
+    return markup
+
+
+def summary_row_markup(provider_name: str, cred, colors: dict) -> str:
+    """Markup for a worst-N summary row: [pct%  provider  tab  name]."""
+    color = severity_color(cred.severity, colors)
+    name = GLib.markup_escape_text(cred.name[:20])
+    return (
+        f"<tt><span color='{color}'>{int(cred.worst_pct):>3}%</span> "
+        f"{provider_name.upper()[:10]:10s} {cred.id}{cred.tier} {name}</tt>"
+    )
+
+
+def cred_tab_markup(cred) -> str:
+    return f"<tt>{cred.id}{cred.tier}</tt>"
+
+
+def severity_color(code: int, colors: dict) -> str:
+    return colors[severity.COLOR_KEYS[code]]
+
+
+def quota_line_markup(
+    name: str, remaining: int, max_req: int, pct: float, code: int, colors: dict
+) -> str:
+    """Markup for the [name  remaining/max  pct%] part of a quota row."""
+    color = severity_color(code, colors)
+    name_short = name[:10]
+    return (
+        f"<tt><span color='{color}'>{name_short:10s}</span> "
+        f"{remaining:>5}/{max_req:<5} "
+        f"<span color='{color}'>{int(pct):>3}%</span></tt>"
+    )
+
+
+def make_provider_header(
+    name: str,
+    header_markup: str,
     credentials: list | None = None,
-    selected_id: int = 1,
+    selected_key: str | None = None,
     on_click=None,
-    flash_statuses: dict[int, str] | None = None,
+    flash_statuses: dict[str, str] | None = None,
+    collapsed: bool = False,
+    on_header_click=None,
 ) -> tuple[Gtk.Box, list[Gtk.Widget]]:
-    """Create provider name header with credential tabs."""
+    """Create provider name header (see provider_header_markup) with credential tabs.
+
+    A collapsed header has no tab row; clicking the name calls
+    on_header_click(name) to expand or collapse it.
+    """
     main_vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
 
     # Tab row (on top)
     interactive = []
-    if credentials and len(credentials) > 1:
+    if not collapsed and credentials and len(credentials) > 1:
         tabs = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
         tabs.add_css_class("credential-tabs")
         for c in credentials:
             tab = Gtk.Label()
-            tab.set_markup(f"<tt>{c.id}{c.tier}</tt>")
+            tab.set_markup(cred_tab_markup(c))
             tab.add_css_class("cred-tab")
 
-            if flash_statuses and c.id in flash_statuses:
-                status = flash_statuses[c.id]
+            if flash_statuses and c.key in flash_statuses:
+                status = flash_statuses[c.key]
                 tab.add_css_class(f"cred-tab-flash-{status}")
 
-            if c.id == selected_id:
+            if c.key == selected_key:
                 tab.add_css_class("cred-tab-active")
 
             if on_click:
                 gesture = Gtk.GestureClick()
                 gesture.connect(
-                    "released", lambda g, n, x, y, cid=c.id: on_click(name, cid)
+                    "released", lambda g, n, x, y, key=c.key: on_click(name, key)
                 )
                 tab.add_controller(gesture)
                 interactive.append(tab)
@@ -189,17 +246,33 @@ def make_provider_header(
     # Provider name row
     header_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=0)
     lbl = Gtk.Label()
-    lbl.set_markup(
-        f"<b>{name.upper()}</b> <span size='small' color='#555'>({cred_count})</span>"
-    )
+    lbl.set_markup(header_markup)
     lbl.set_halign(Gtk.Align.START)
     lbl.add_css_class("provider-name")
+    if on_header_click:
+        gesture = Gtk.GestureClick()
+        gesture.connect("released", lambda g, n, x, y: on_header_click(name))
+        lbl.add_controller(gesture)
+        interactive.append(lbl)
     header_box.append(lbl)
     main_vbox.append(header_box)
 
     return main_vbox, interactive
 
 
+def make_summary_row(markup: str, on_click=None) -> Gtk.Label:
+    """Create a worst-N summary row; clicking it calls on_click()."""
+    lbl = Gtk.Label()
+    lbl.set_markup(markup)
+    lbl.set_halign(Gtk.Align.START)
+    lbl.add_css_class("quota-line")
+    if on_click:
+        gesture = Gtk.GestureClick()
+        gesture.connect("released", lambda g, n, x, y: on_click())
+        lbl.add_controller(gesture)
+    return lbl
+
+
 def make_provider_cost(cost: float) -> Gtk.Label:
     """Create cost label for provider."""
     lbl = Gtk.Label()
@@ -209,37 +282,18 @@ def make_provider_cost(cost: float) -> Gtk.Label:
     return lbl
 
 
-def make_quota_row(
-    name: str,
-    remaining: int,
-    max_req: int,
-    pct: float,
-    reset_countdown: str,
-    colors: dict,
-) -> Gtk.Box:
+def make_quota_row(line_markup: str, reset_countdown: str) -> Gtk.Box:
     """
     Create a single quota row.
 
-    Layout: [name  remaining/max  pct%] [reset_time]
+    Layout: [name  remaining/max  pct%] [reset_time], where line_markup is
+    the quota_line_markup part.
     """
     row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
 
-    # Pick color based on percentage
-    if pct <= 10:
-        color = colors["critical"]
-    elif pct < 30:
-        color = colors["warning"]
-    else:
-        color = colors["ok"]
-
     # Quota info
-    name_short = name[:10]
     info = Gtk.Label()
-    info.set_markup(
-        f"<tt><span color='{color}'>{name_short:10s}</span> "
-        f"{remaining:>5}/{max_req:<5} "
-        f"<span color='{color}'>{int(pct):>3}%</span></tt>"
-    )
+    info.set_markup(line_markup)
     info.set_halign(Gtk.Align.START)
     info.add_css_class("quota-line")
     row.append(info)
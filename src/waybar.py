@@ -0,0 +1,95 @@
+"""Streaming status-bar output (waybar custom module / i3blocks persist).
+
+Prints one JSON object per line on stdout, and only when the rendered
+output changes. Polls over a single keep-alive connection to the proxy.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from typing import Callable, Optional, TextIO
+
+from .config import CONFIG
+from . import data
+from .cli import render_table
+from .severity import NAMES as SEVERITY_NAMES
+
+
+def worst_group(
+    quota_data: data.QuotaData,
+) -> Optional[tuple[data.Provider, data.QuotaGroup]]:
+    """The provider and quota group with the highest severity, then the lowest
+    remaining percentage (thresholds can differ per provider)."""
+    worst = None
+    worst_rank = None
+    for provider in quota_data.providers:
+        if provider.credentials:
+            groups = [g for c in provider.credentials for g in c.quota_groups]
+        else:
+            groups = provider.quota_groups
+        for group in groups:
+            rank = (-group.severity, float(group.remaining_pct or 0))
+            if worst_rank is None or rank < worst_rank:
+                worst, worst_rank = (provider, group), rank
+    return worst
+
+
+def render_status(quota_data: Optional[data.QuotaData]) -> dict:
+    """Build the waybar JSON object for a snapshot."""
+    if quota_data is None:
+        return {"text": "offline", "tooltip": "proxy unreachable", "class": "offline"}
+
+    tooltip = "\n".join(render_table(quota_data))
+    worst = worst_group(quota_data)
+    if worst is None:
+        return {"text": "-", "tooltip": tooltip, "class": "ok"}
+
+    provider, group = worst
+    pct = float(group.remaining_pct or 0)
+    text = CONFIG["waybar"]["format"].format(
+        pct=int(pct),
+        provider=provider.name,
+        group=group.name,
+        countdown=data.format_countdown(group.reset_time_iso),
+    )
+    return {
+        "text": text,
+        "tooltip": tooltip,
+        "class": SEVERITY_NAMES[group.severity],
+        "percentage": int(pct),
+    }
+
+
+def stream(
+    fetch: Callable[[], Optional[data.QuotaData]],
+    out: TextIO = sys.stdout,
+) -> None:
+    """Poll forever, writing a line whenever the rendered status changes."""
+    interval = CONFIG["server"]["refresh_interval_ms"] / 1000
+    last_line = None
+    try:
+        while True:
+            line = json.dumps(render_status(fetch()), separators=(",", ":"))
+            if line != last_line:
+                out.write(line + "\n")
+                out.flush()
+                last_line = line
+            time.sleep(interval)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+
+
+def run_waybar(use_daemon: bool = False) -> None:
+    if use_daemon:
+        from .daemon import fetch_from_daemon
+
+        stream(fetch_from_daemon)
+        return
+
+    session = data.ProxySession()
+    try:
+        stream(lambda: data.fetch_quota_data(session))
+    finally:
+        session.close()
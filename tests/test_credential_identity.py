@@ -0,0 +1,75 @@
+"""Credential state follows the proxy credential key, not list position."""
+
+from src import alerts, data, flash
+
+
+def credential(identifier, remaining):
+    return {
+        "identifier": identifier,
+        "tier": "standard",
+        "group_usage": {"pro": {"windows": {"daily": {"remaining": remaining, "limit": 100}}}},
+    }
+
+
+def payload(*creds):
+    return {
+        "providers": {
+            "gemini_cli": {
+                "credential_count": len(creds),
+                "quota_groups": {},
+                "credentials": dict(creds),
+            }
+        }
+    }
+
+
+def provider(body):
+    (p,) = data.parse_quota_data(body).providers
+    return p
+
+
+def test_lookup_survives_reordering():
+    first = provider(payload(("a", credential("a@x", 80)), ("b", credential("b@x", 40))))
+    second = provider(payload(("b", credential("b@x", 40)), ("a", credential("a@x", 80))))
+
+    assert [c.key for c in second.credentials] == ["b", "a"]
+    for key in ("a", "b"):
+        assert first.credentials_by_key[key].name == second.credentials_by_key[key].name
+        assert (
+            first.credentials_by_key[key].worst_pct
+            == second.credentials_by_key[key].worst_pct
+        )
+
+
+def test_flash_follows_credential_across_reordering():
+    state = flash.FlashState()
+    first = provider(payload(("a", credential("a@x", 80)), ("b", credential("b@x", 80))))
+    assert flash.compute_flash_statuses("gemini_cli", first.credentials, state, now=0.0) == {}
+
+    # "b" drops to critical while the proxy swaps the order.
+    second = provider(payload(("b", credential("b@x", 5)), ("a", credential("a@x", 80))))
+    statuses = flash.compute_flash_statuses("gemini_cli", second.credentials, state, now=1.0)
+
+    assert statuses == {"b": "critical"}
+
+
+def test_vanished_credential_is_evicted():
+    state = flash.FlashState()
+    first = provider(payload(("a", credential("a@x", 80)), ("b", credential("b@x", 80))))
+    flash.compute_flash_statuses("gemini_cli", first.credentials, state, now=0.0)
+
+    second = provider(payload(("b", credential("b@x", 80)),))
+    flash.compute_flash_statuses("gemini_cli", second.credentials, state, now=1.0)
+
+    assert set(state.providers["gemini_cli"]) == {"b"}
+
+
+def test_shared_identifier_keeps_separate_alert_state():
+    engine = alerts.AlertEngine([alerts.AlertRule(threshold=10, credential="same@x")])
+    quota_data = data.parse_quota_data(
+        payload(("a", credential("same@x", 5)), ("b", credential("same@x", 5)))
+    )
+
+    fired = engine.evaluate(quota_data)
+
+    assert [a.credential for a in fired] == ["same@x", "same@x"]
@@ -0,0 +1,63 @@
+"""Recordings survive sessions that were killed without closing their file."""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from src import replay
+
+ROOT = Path(__file__).resolve().parent.parent
+
+KILLED_SESSION = """
+import os, sys
+from src import replay
+recorder = replay.Recorder(sys.argv[1])
+recorder.write(b'{"killed": 1}')
+recorder.write(b'{"killed": 2}')
+os._exit(0)  # like SIGKILL: no close(), no gzip trailer
+"""
+
+
+def record(directory, *bodies):
+    recorder = replay.Recorder(str(directory))
+    for body in bodies:
+        recorder.write(body)
+    recorder.close()
+    # Session files are named by their start time in milliseconds.
+    time.sleep(0.002)
+
+
+def bodies(path):
+    return [body for _, body in replay.iter_records(str(path))]
+
+
+def test_recording_after_killed_session_replays(tmp_path):
+    record(tmp_path, b'{"first": 1}')
+    subprocess.run(
+        [sys.executable, "-c", KILLED_SESSION, str(tmp_path)], cwd=ROOT, check=True
+    )
+    time.sleep(0.002)
+    record(tmp_path, b'{"last": 1}')
+
+    assert bodies(tmp_path) == [
+        b'{"first": 1}',
+        b'{"killed": 1}',
+        b'{"killed": 2}',
+        b'{"last": 1}',
+    ]
+
+
+def test_corrupt_session_only_ends_that_file(tmp_path):
+    record(tmp_path, b'{"first": 1}', b'{"first": 2}')
+    record(tmp_path, b'{"last": 1}')
+    first = replay.recording_paths(str(tmp_path))[0]
+    first.write_bytes(first.read_bytes()[:-12] + b"\x00garbage\xff" * 4)
+
+    assert bodies(tmp_path)[-1] == b'{"last": 1}'
+
+
+def test_non_utf8_body_round_trips(tmp_path):
+    record(tmp_path, b"\xff\xfe\x00binary")
+
+    assert bodies(tmp_path) == [b"\xff\xfe\x00binary"]
@@ -0,0 +1,36 @@
+"""Per-provider thresholds decide which group the status bar reports."""
+
+from src import data, waybar
+from src.config import CONFIG
+
+
+def provider(remaining):
+    return {
+        "credential_count": 1,
+        "quota_groups": {},
+        "credentials": {
+            "a": {
+                "identifier": "a@x",
+                "group_usage": {
+                    "g": {"windows": {"daily": {"remaining": remaining, "limit": 100}}}
+                },
+            }
+        },
+    }
+
+
+def test_waybar_reports_most_severe_group(monkeypatch):
+    severity = {
+        "critical": 10.0,
+        "warn": 30.0,
+        "providers": {"Gemini_CLI": {"critical": 50}},
+    }
+    monkeypatch.setitem(CONFIG, "severity", severity)
+    quota_data = data.parse_quota_data(
+        {"providers": {"gemini_cli": provider(40), "antigravity": provider(20)}}
+    )
+
+    status = waybar.render_status(quota_data)
+
+    assert status["class"] == "critical"
+    assert status["percentage"] == 40